@@ -1,38 +1,124 @@
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 import google.generativeai as genai
 import json
+import math
+import os
 import random
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
+from content_packs import ContentPack
+from content_pool import ContentPool
+from conversation import CHAT_GENERATION_CONFIG, ChatMemory, estimate_tokens, summary_prompt, system_preamble
+from exercises import (ANSWER_CHECK_CONFIG, EXERCISE_GENERATION_CONFIG, EXERCISE_GROUPS, ExerciseQueue,
+                       answer_check_prompt, batch_prompt, exercise_markdown, parse_answer_check, parse_exercises)
+from feedback import (FEEDBACK_GENERATION_CONFIG, feedback_prompt, merge_feedback, parse_feedback, sentence_key,
+                      split_sentences)
+from gemini_client import ClientRegistry, GeminiError, RequestError, TokenBucket, classify_error
+from grading import answer_key, grade, grade_any, keyboard, letter_key
+from grading import sentence_key as translation_key
+from learner_store import LearnerStore
+from prompts import (LANGUAGES, LEARNING_FOCUSES, SKILL_LEVELS, minimal_pairs_prompt,
+                     phonetic_chart_prompt, sentences_prompt)
+from quiz_engine import generate_quiz, quiz_to_csv, quiz_to_json
+from response_cache import ResponseCache, make_key
+from scheduler import Scheduler
+from singleflight import SingleFlight
+from telemetry import Telemetry
+from vocab import VOCAB_GENERATION_CONFIG, format_vocab_markdown, iter_vocab_json, parse_vocab_json, vocab_prompt
+from vocab_index import VocabIndex, fold
+
+MODEL_NAME = "gemini-2.0-flash"
+MAX_PARALLEL_REQUESTS = 8
+# Workers for pool refills and prefetches, kept apart so they never delay calls a learner is waiting on
+MAX_BACKGROUND_REQUESTS = 2
+REQUESTS_PER_MINUTE = 60
+MAX_IN_FLIGHT_REQUESTS = 16
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "responses.sqlite3")
+LEARNER_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "learners.sqlite3")
+PACK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "packs", "content.pack")
+SAVED_LISTS_PAGE_SIZE = 20
+# Exercises of each kind requested per batched call
+EXERCISES_PER_KIND = 3
+# New or edited sentences sent per writing feedback request
+FEEDBACK_BATCH_SIZE = 20
+# Known words listed in a vocabulary prompt for the model to leave out
+VOCAB_AVOID_LIMIT = 150
+# Extra words asked for, and requests made at most, to fill a list despite collisions with known words
+VOCAB_EXTRA_WORDS = 3
+VOCAB_FILL_ROUNDS = 3
+# What each parallel vocabulary shard asks for, so shards don't return the same words
+VOCAB_SHARD_KINDS = ("nouns", "verbs", "adjectives and adverbs", "everyday phrases and expressions")
+# Estimated tokens of conversation history (summary plus recent turns) sent with each chat turn
+CHAT_TOKEN_BUDGET = 1500
+# Most recent chat turns that are always sent word for word
+CHAT_KEEP_RECENT = 6
+# Chat clients, and the cached preamble they use, are rebuilt once per window
+PREAMBLE_CACHE_SECONDS = 3600
+# Smallest content Gemini's context caching accepts for MODEL_NAME; shorter preambles are sent inline
+MIN_CACHED_TOKENS = 4096
+SECTIONS = ["🧠 Vocabulary & Sentences", "🗣️ Pronunciation", "📝 Writing Practice", "🎮 Quiz & Games", "💬 Conversation",
+            "ℹ️ About"]
+# Keyed widgets in sections that aren't rendered on a rerun; Streamlit drops
+# the state of widgets it doesn't see, so these are carried over explicitly
+PERSISTENT_WIDGET_KEYS = ["section", "pronunciation_section", "pronunciation_type", "stress_sentence",
+                          "syllable_word", "audio_type", "native_language", "visual_target_language",
+                          "visual_sound", "writing_type", "user_writing", "game_type", "chat_token_budget",
+                          "vocab_lookup"]
+# Keys of widgets created per item: quiz answers and graded exercise answer boxes
+PERSISTENT_WIDGET_PATTERN = re.compile(r"q\d+|(translation|fill_blanks)_\w+_\d+")
+# Set FLUENTFLOW_ADMIN=1 to show per-family usage telemetry in the sidebar
+SHOW_ADMIN_PANEL = os.environ.get("FLUENTFLOW_ADMIN") == "1"
+
 # Page configuration
 st.set_page_config(page_title="AI Language Learning", layout="wide",page_icon="🌍")
 
 # Initialize session state variables
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = []
+if "chat_memory" not in st.session_state:
+    st.session_state.chat_memory = ChatMemory(CHAT_TOKEN_BUDGET, CHAT_KEEP_RECENT)
+if "chat_token_budget" not in st.session_state:
+    st.session_state.chat_token_budget = CHAT_TOKEN_BUDGET
 if "vocab_list" not in st.session_state:
     st.session_state.vocab_list = None
 if "flashcards" not in st.session_state:
     st.session_state.flashcards = []
 if "current_card" not in st.session_state:
     st.session_state.current_card = 0
-if "saved_vocab" not in st.session_state:
-    st.session_state.saved_vocab = {}
 if "quiz_questions" not in st.session_state:
     st.session_state.quiz_questions = []
 if "quiz_score" not in st.session_state:
     st.session_state.quiz_score = 0
 if "quiz_total" not in st.session_state:
     st.session_state.quiz_total = 0
+if "selected_ipa" not in st.session_state:
+    st.session_state.selected_ipa = None
+# Keep the values of widgets in sections hidden on this run
+for key in PERSISTENT_WIDGET_KEYS:
+    if key in st.session_state:
+        st.session_state[key] = st.session_state[key]
+for key in list(st.session_state):
+    if PERSISTENT_WIDGET_PATTERN.fullmatch(key):
+        st.session_state[key] = st.session_state[key]
 if "last_settings" not in st.session_state:
     st.session_state.last_settings = {}
 
 # Sidebar Inputs
 st.sidebar.title("Language Learning Settings")
 api_key = st.sidebar.text_input("Enter your Gemini API Key", type="password")
-target_language = st.sidebar.selectbox("Target Language", ["Spanish", "French", "German", "Japanese", "Mandarin", "Italian", "Portuguese", "Russian", "Korean", "Arabic"])
-skill_level = st.sidebar.selectbox("Skill Level", ["Beginner", "Intermediate", "Advanced"])
-learning_focus = st.sidebar.selectbox("Learning Focus", ["General", "Travel", "Business", "Academic", "Medical", "Technology"])
+target_language = st.sidebar.selectbox("Target Language", LANGUAGES)
+skill_level = st.sidebar.selectbox("Skill Level", SKILL_LEVELS)
+learning_focus = st.sidebar.selectbox("Learning Focus", LEARNING_FOCUSES)
+learner_id = st.sidebar.text_input("Learner ID", help="Use the same ID on any device to keep your saved lists, quiz history and reviews.")
+if not learner_id:
+    # Anonymous learners still get a stable ID for the rest of this session
+    learner_id = st.session_state.setdefault("guest_id", f"guest-{uuid.uuid4().hex[:8]}")
 
 # Track settings changes
 current_settings = {"target_language": target_language, "skill_level": skill_level, "learning_focus": learning_focus}
@@ -41,25 +127,555 @@ settings_changed = current_settings != st.session_state.last_settings
 # Save current settings
 st.session_state.last_settings = current_settings.copy()
 
+@st.cache_resource
+def get_learner_store():
+    """Durable store for saved lists, quiz history, game results and review cards"""
+    os.makedirs(os.path.dirname(LEARNER_DB_PATH), exist_ok=True)
+    return LearnerStore(LEARNER_DB_PATH)
+
+learner_store = get_learner_store()
+lost_writes = learner_store.take_failures(learner_id)
+if lost_writes:
+    st.warning(f"{lost_writes} recent changes to your saved progress couldn't be stored. Please try again.")
+
+# Load this learner's spaced-repetition deck once per session (or when the ID changes)
+if st.session_state.get("scheduler_user") != learner_id:
+    scheduler = Scheduler()
+    for row in learner_store.load_cards(learner_id):
+        scheduler.restore(*row)
+    st.session_state.scheduler = scheduler
+    st.session_state.scheduler_user = learner_id
+    # Words in the review deck count as seen, so the vocab index won't serve them as new
+    seen_words = {}
+    for card in scheduler.cards.values():
+        seen_words.setdefault(card.card_id.split(":", 1)[0], set()).add(fold(card.word))
+    st.session_state.seen_words = seen_words
+
+@st.cache_resource
+def get_content_pack():
+    """Memory-mapped offline content pack, or None if it hasn't been built"""
+    if not os.path.exists(PACK_PATH):
+        return None
+    return ContentPack(PACK_PATH)
+
+content_pack = get_content_pack()
+
 # Set API Key
 if not api_key:
-    st.warning("Please enter your Gemini API key in the sidebar.")
-    st.stop()
+    if content_pack is None:
+        st.warning("Please enter your Gemini API key in the sidebar.")
+        st.stop()
+    st.info("No API key entered: serving offline content only. Enter your Gemini API key in the sidebar to generate new content.")
+
+def build_model(api_key, model_name):
+    """Create a GenerativeModel bound to its own API key and connection pool.
+
+    genai.configure() sets a single process-global key, which sessions with
+    different keys would keep overwriting, so each model gets its own
+    service client instead.
+    """
+    from google.ai import generativelanguage as glm
+
+    model = genai.GenerativeModel(model_name)
+    model._client = glm.GenerativeServiceClient(client_options={"api_key": api_key})
+    return model
+
+@st.cache_resource
+def get_client_registry():
+    """Configured clients shared across reruns and sessions, with a process-wide
+    token bucket and in-flight cap"""
+    limiter = TokenBucket(rate=REQUESTS_PER_MINUTE / 60, capacity=max(1, REQUESTS_PER_MINUTE // 6))
+    return ClientRegistry(build_model, limiter, threading.BoundedSemaphore(MAX_IN_FLIGHT_REQUESTS))
+
+def build_chat_model(api_key, spec):
+    """Create a conversation GenerativeModel for spec, (model name, language, level, focus, window).
+
+    A preamble of at least MIN_CACHED_TOKENS is stored once with Gemini
+    context caching, so every turn refers to it instead of resending it. The
+    cache outlives the window it was built for, and the next window builds a
+    new client, so no turn uses an expired cache. A shorter preamble (the
+    built-in ones are a few hundred characters) is sent as a plain system
+    instruction without trying, as is one the model refuses to cache;
+    auth and transport errors are raised.
+    """
+    from datetime import timedelta
+
+    from google.ai import generativelanguage as glm
+    from google.api_core.exceptions import FailedPrecondition, InvalidArgument
+
+    model_name, language, level, focus, _ = spec
+    preamble = system_preamble(language, level, focus)
+    model = None
+    if estimate_tokens(preamble) >= MIN_CACHED_TOKENS:
+        cache_service = glm.CacheServiceClient(client_options={"api_key": api_key})
+        try:
+            cached = cache_service.create_cached_content(cached_content=glm.CachedContent(
+                model=f"models/{model_name}",
+                system_instruction=glm.Content(parts=[glm.Part(text=preamble)]),
+                ttl=timedelta(seconds=2 * PREAMBLE_CACHE_SECONDS),
+            ))
+        except (InvalidArgument, FailedPrecondition):
+            # The model doesn't support caching this content
+            pass
+        else:
+            model = genai.GenerativeModel(model_name)
+            # What GenerativeModel.from_cached_content sets, without going through the process-global client
+            model._cached_content = cached.name
+    if model is None:
+        model = genai.GenerativeModel(model_name, system_instruction=preamble)
+    model._client = glm.GenerativeServiceClient(client_options={"api_key": api_key})
+    return model
+
+@st.cache_resource
+def get_chat_registry():
+    """Conversation clients keyed by API key and settings, sharing the main rate limit and in-flight cap"""
+    registry = get_client_registry()
+    return ClientRegistry(build_chat_model, registry.limiter, registry.semaphore)
 
 # Configure Gemini
 try:
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel("gemini-2.0-flash")
+    client = get_client_registry().get(api_key, MODEL_NAME) if api_key else None
 except Exception as e:
     st.error(f"Error configuring Gemini API: {e}")
     st.stop()
 
-def gemini_response(prompt):
+@st.cache_resource
+def get_response_cache():
+    """Process-wide response cache shared by every session"""
+    return ResponseCache(CACHE_PATH)
+
+@st.cache_resource
+def get_single_flight():
+    """Coalesces identical prompts that are in flight at the same time across sessions"""
+    return SingleFlight()
+
+@st.cache_resource
+def get_telemetry():
+    """Per-family latency, token, cache and error counters for the whole process"""
+    return Telemetry(MODEL_NAME)
+
+response_cache = get_response_cache()
+single_flight = get_single_flight()
+telemetry = get_telemetry()
+cache_stats = response_cache.stats
+st.sidebar.caption(
+    f"Response cache: {cache_stats['memory_hits'] + cache_stats['disk_hits']} hits, "
+    f"{cache_stats['misses']} misses, {cache_stats['evictions']} evictions"
+)
+
+def gemini_response(prompt, family="general", generation_config=None, variant=0, stream=False):
+    """Return Gemini's answer to prompt, served from the response cache when possible.
+
+    With stream=True the answer is also rendered into the page chunk by chunk
+    as it arrives, and the full text is still returned once it is complete.
+
+    Identical prompts already in flight from another session or thread are
+    not sent again; the caller waits for the shared result instead. A
+    streamed call is read on the generation pool into a shared buffer that
+    each session renders on its own, so a rerun in one session neither
+    cuts the call short for the others nor reaches their scripts.
+
+    Raises GeminiError (or a subclass) when the call fails after retries.
+    """
+    key = make_key(MODEL_NAME, prompt, generation_config, variant)
+    cached = response_cache.get(key)
+    telemetry.record_cache(family, cached is not None)
+    if cached is not None:
+        if stream:
+            st.markdown(cached)
+        return cached
+    if client is None:
+        raise RequestError("Enter your Gemini API key in the sidebar to generate new content.")
+
+    def call_model(append=None):
+        started = time.perf_counter()
+        completion = None
+        try:
+            if append is not None:
+                with client.stream(prompt, generation_config) as completion:
+                    for chunk in completion:
+                        append(chunk)
+            else:
+                completion = client.generate(prompt, generation_config)
+        except GeminiError as e:
+            attempts = e.attempts if completion is None else completion.attempts
+            telemetry.record_call(family, time.perf_counter() - started, getattr(completion, "usage", None),
+                                  attempts, error=e, stream=stream)
+            raise
+        telemetry.record_call(family, time.perf_counter() - started, completion.usage, completion.attempts,
+                              stream=stream)
+        response_cache.set(key, completion.text, family)
+        return completion.text
+
+    if stream:
+        placeholder = st.empty()
+        buffer, leader = single_flight.stream(key, call_model, get_generation_pool())
+        if not leader:
+            telemetry.record_coalesced(family)
+        return render_stream(placeholder, buffer)
+
+    text, leader = single_flight.do(key, call_model)
+    if not leader:
+        telemetry.record_coalesced(family)
+    return text
+
+def stream_response(prompt, family="general", generation_config=None, variant=0):
+    """Yield Gemini's answer to prompt chunk by chunk without rendering anything.
+
+    Safe to run on worker threads. A cached answer is yielded in one piece;
+    a streamed one is cached once it has been received in full.
+    """
+    key = make_key(MODEL_NAME, prompt, generation_config, variant)
+    cached = response_cache.get(key)
+    telemetry.record_cache(family, cached is not None)
+    if cached is not None:
+        yield cached
+        return
+    if client is None:
+        raise RequestError("Enter your Gemini API key in the sidebar to generate new content.")
+
+    started = time.perf_counter()
+    completion = None
+    try:
+        with client.stream(prompt, generation_config) as completion:
+            yield from completion
+    except GeminiError as e:
+        attempts = e.attempts if completion is None else completion.attempts
+        telemetry.record_call(family, time.perf_counter() - started, getattr(completion, "usage", None),
+                              attempts, error=e, stream=True)
+        raise
+    telemetry.record_call(family, time.perf_counter() - started, completion.usage, completion.attempts, stream=True)
+    response_cache.set(key, completion.text, family)
+
+def rerun_fragment():
+    """Rerun only the calling fragment, or the whole app when the fragment is
+    being drawn as part of a full run (Streamlit refuses a fragment-scoped
+    rerun there, and AppTest always runs the full script)"""
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+def render_stream(placeholder, chunks):
+    """Render streamed text chunks into placeholder as they arrive"""
+    text = ""
+    for chunk in chunks:
+        text += chunk
+        placeholder.markdown(text + "▌")
+    placeholder.markdown(text)
+    return text
+
+def fresh_response(prompt, family="general", generation_config=None):
+    """Like gemini_response, but each repeat within a session asks for a new variant.
+
+    "Generate New ..." buttons should not hand the same learner the same list
+    twice, while the n-th request for a prompt is still shared across sessions.
+    """
+    variant = next_variant(prompt, generation_config)
+    return gemini_response(prompt, family, generation_config, variant=variant)
+
+def next_variant(prompt, generation_config=None):
+    """Number of times this session has asked for prompt so far"""
+    counts = st.session_state.setdefault("prompt_variants", {})
+    key = make_key(MODEL_NAME, prompt, generation_config)
+    variant = counts.get(key, 0)
+    counts[key] = variant + 1
+    return variant
+
+@st.cache_resource
+def get_generation_pool():
+    """Bounded worker pool for concurrent model calls, shared by every session"""
+    return ThreadPoolExecutor(max_workers=MAX_PARALLEL_REQUESTS, thread_name_prefix="gemini")
+
+@st.cache_resource
+def get_background_pool():
+    """Small worker pool for speculative generation (pool refills, prefetches)"""
+    return ThreadPoolExecutor(max_workers=MAX_BACKGROUND_REQUESTS, thread_name_prefix="gemini-background")
+
+@st.cache_resource
+def get_vocab_index():
+    """Every vocabulary entry served so far, shared by every session"""
+    return VocabIndex()
+
+@st.cache_resource
+def get_content_pool():
+    """Generated content sets shared by every session with the same settings"""
+    return ContentPool(get_background_pool())
+
+def show_content(prompt, family, pack_entry, stream=False):
+    """Render the offline pack's text for pack_entry if there is one, otherwise ask Gemini"""
+    text = content_pack.get(*pack_entry) if content_pack is not None else None
+    if text:
+        st.markdown(text)
+        return text
+    return show_response(prompt, family, stream=stream)
+
+def session_memo(name, inputs, compute):
+    """Return compute() for this session, re-running it only when inputs change.
+
+    A GeminiError is remembered too and raised again on every rerun with the
+    same inputs, so unrelated widget changes don't repeat a failing call
+    (and its retries); retry_memo_button() lets the learner try again.
+    """
+    memo = st.session_state.setdefault("memo", {})
+    entry = memo.get(name)
+    if entry is not None and entry[0] == inputs:
+        if entry[2] is not None:
+            raise entry[2].with_traceback(None)
+        return entry[1]
+    try:
+        result = compute()
+    except GeminiError as e:
+        memo[name] = (inputs, None, e)
+        raise
+    memo[name] = (inputs, result, None)
+    return result
+
+def retry_memo_button(name):
+    """Button that forgets the remembered failure of session_memo(name, ...) and reruns"""
+    if st.button("Try Again", key=f"retry_{name}"):
+        st.session_state.setdefault("memo", {}).pop(name, None)
+        st.rerun()
+
+def show_response(prompt, family="general", stream=False, fresh=False):
+    """Render Gemini's answer to prompt, or the error if the call failed.
+
+    Returns the text, or None on failure.
+    """
     try:
-        response = model.generate_content(prompt)
-        return response.text
+        if fresh:
+            text = fresh_response(prompt, family)
+        else:
+            text = gemini_response(prompt, family, stream=stream)
+    except GeminiError as e:
+        st.error(f"Gemini request failed: {e}")
+        return None
+    if not stream:
+        st.markdown(text)
+    return text
+
+def next_exercise(group, kind):
+    """Next queued exercise of kind for the current settings.
+
+    When the queue for these settings has none left, one batched call asks
+    for EXERCISES_PER_KIND of every kind in the group and refills it.
+    Returns None if the reply held nothing usable for kind; raises
+    GeminiError if the call fails.
+    """
+    queue = st.session_state.setdefault("exercise_queue", ExerciseQueue())
+    key = (target_language, skill_level, learning_focus, group)
+    text = queue.pop(key, kind)
+    if text is None:
+        kinds = EXERCISE_GROUPS[group]
+        prompt = batch_prompt(kinds, EXERCISES_PER_KIND, target_language, skill_level, learning_focus)
+        queue.add(key, parse_exercises(fresh_response(prompt, "exercise_batch", EXERCISE_GENERATION_CONFIG), kinds))
+        text = queue.pop(key, kind)
+    return text
+
+def show_exercise(group, kind, fallback_prompt, family, fresh=False):
+    """Render the next batched exercise of kind, or the error if the call failed.
+
+    If the batch came back without this kind, fallback_prompt is asked on its
+    own through show_response. Returns the text, or None on failure.
+    """
+    try:
+        exercise = next_exercise(group, kind)
+    except GeminiError as e:
+        st.error(f"Gemini request failed: {e}")
+        return None
+    if exercise is None:
+        return show_response(fallback_prompt, family, fresh=fresh)
+    text = exercise_markdown(exercise)
+    st.markdown(text)
+    return text
+
+def start_graded_exercise(kind, fallback_prompt):
+    """Take the next writing exercise of kind and keep it, with precomputed
+    answer keys, in st.session_state.graded_exercises until the next one.
+
+    Exercises that came without answer keys are shown as plain text instead.
+    """
+    exercises = st.session_state.setdefault("graded_exercises", {})
+    exercises.pop(kind, None)
+    try:
+        exercise = next_exercise("writing", kind)
+    except GeminiError as e:
+        st.error(f"Gemini request failed: {e}")
+        return
+    if exercise is None or not exercise["items"]:
+        if exercise is None:
+            show_response(fallback_prompt, kind, fresh=True)
+        else:
+            st.markdown(exercise_markdown(exercise))
+        return
+    build_key = translation_key if kind == "translation" else answer_key
+    exercises[kind] = {
+        "exercise": exercise,
+        "language": target_language,
+        "keys": [[build_key(answer, target_language) for answer in item["answers"] if answer]
+                 for item in exercise["items"]],
+        "id": uuid.uuid4().hex[:8],
+        "results": None,
+    }
+
+def check_undecided(state, index, response):
+    """Ask Gemini about an answer the local grader couldn't decide.
+
+    Returns (correct, explanation), or (None, message) if the check failed.
+    """
+    item = state["exercise"]["items"][index]
+    prompt = answer_check_prompt(state["language"], item["prompt"], item["answers"], response)
+    try:
+        verdict = parse_answer_check(gemini_response(prompt, "answer_check", ANSWER_CHECK_CONFIG))
+    except GeminiError as e:
+        return None, f"Couldn't check this one: {e}"
+    return verdict if verdict is not None else (None, "Couldn't check this one.")
+
+def sentence_feedback(text):
+    """Per-sentence feedback on text, as (sentences, {sentence: result}, number of sentences sent).
+
+    Sentences seen before (by any learner, at the same language and level)
+    come from the response cache; only new or edited ones are sent, in
+    batches of FEEDBACK_BATCH_SIZE that run in parallel.
+    """
+    sentences = split_sentences(text)
+    results = {}
+    missing = []
+    for sentence in dict.fromkeys(sentences):
+        cached = response_cache.get(sentence_key(target_language, skill_level, sentence))
+        telemetry.record_cache("sentence_feedback", cached is not None)
+        if cached is not None:
+            results[sentence] = json.loads(cached)
+        else:
+            missing.append(sentence)
+
+    def check_batch(batch):
+        numbered = [(f"s{i}", sentence) for i, sentence in enumerate(batch, 1)]
+        raw = gemini_response(feedback_prompt(target_language, skill_level, numbered), "feedback",
+                              FEEDBACK_GENERATION_CONFIG)
+        parsed = parse_feedback(raw, [sentence_id for sentence_id, _ in numbered])
+        return [(sentence, parsed.get(sentence_id)) for sentence_id, sentence in numbered]
+
+    batches = [missing[i:i + FEEDBACK_BATCH_SIZE] for i in range(0, len(missing), FEEDBACK_BATCH_SIZE)]
+    errors = []
+    for future in [get_generation_pool().submit(check_batch, batch) for batch in batches]:
+        try:
+            checked = future.result()
+        except GeminiError as e:
+            errors.append(e)
+            continue
+        for sentence, result in checked:
+            if result is not None:
+                results[sentence] = result
+                response_cache.set(sentence_key(target_language, skill_level, sentence), json.dumps(result),
+                                   "sentence_feedback")
+    if errors and not results:
+        raise errors[0]
+    return sentences, results, len(missing)
+
+def chat_reply(placeholder):
+    """Stream the partner's reply to the conversation so far into placeholder and return it.
+
+    Only the running summary and the recent turns are sent; the preamble
+    comes from the chat client for the current settings.
+    """
+    window = int(time.time() // PREAMBLE_CACHE_SECONDS)
+    try:
+        chat_client = get_chat_registry().get(api_key, (MODEL_NAME, target_language, skill_level, learning_focus,
+                                                        window))
     except Exception as e:
-        return f"Error: {e}"
+        # Building the client can fail on auth or transport while caching the preamble
+        raise classify_error(e) from e
+    contents = st.session_state.chat_memory.contents(st.session_state.chat_history)
+    started = time.perf_counter()
+    completion = None
+    try:
+        # Closing releases the in-flight slot even when a rerun interrupts rendering
+        with chat_client.stream(contents, CHAT_GENERATION_CONFIG) as completion:
+            text = render_stream(placeholder, completion)
+    except GeminiError as e:
+        attempts = e.attempts if completion is None else completion.attempts
+        telemetry.record_call("conversation", time.perf_counter() - started, getattr(completion, "usage", None),
+                              attempts, error=e, stream=True)
+        raise
+    telemetry.record_call("conversation", time.perf_counter() - started, completion.usage, completion.attempts,
+                          stream=True)
+    return text
+
+def start_chat_summary():
+    """Once the history is over budget, fold its older turns into the summary on the generation pool.
+
+    Runs after a reply has been shown, so the learner reads and types while
+    the summary is written.
+    """
+    if st.session_state.get("chat_summary_job") is not None:
+        return
+    memory = st.session_state.chat_memory
+    turns = memory.to_fold(st.session_state.chat_history)
+    if turns:
+        prompt = summary_prompt(target_language, memory.summary, turns)
+        future = get_generation_pool().submit(gemini_response, prompt, "chat_summary")
+        st.session_state.chat_summary_job = (future, memory.start + len(turns))
+
+def finish_chat_summary():
+    """Apply the pending summary before the next turn is sent"""
+    job = st.session_state.get("chat_summary_job")
+    if job is None:
+        return
+    st.session_state.chat_summary_job = None
+    future, upto = job
+    memory = st.session_state.chat_memory
+    try:
+        summary = future.result()
+    except GeminiError:
+        # Drop the turns under the old summary rather than let every later turn resend them
+        summary = memory.summary
+    memory.fold(summary.strip(), upto)
+
+@st.fragment
+def graded_exercise(kind):
+    """Show the kept exercise of kind with an answer box per item, graded on Check Answers"""
+    state = st.session_state.get("graded_exercises", {}).get(kind)
+    if state is None:
+        return
+    exercise = state["exercise"]
+    st.markdown(exercise_markdown(exercise))
+    responses = []
+    for i, item in enumerate(exercise["items"]):
+        label = f"{i+1}. {item['prompt']}" if kind == "translation" else f"Blank {item['prompt']}"
+        responses.append(st.text_input(label, key=f"{kind}_{state['id']}_{i}"))
+    
+    if st.button("Check Answers", key=f"check_{kind}"):
+        results = []
+        for i, response in enumerate(responses):
+            result = grade_any(state["keys"][i], response, state["language"], sentence=kind == "translation")
+            if result is None:
+                results.append(("model",) + check_undecided(state, i, response))
+            elif result.correct:
+                results.append(("local", True, "" if result.exact else "spelling"))
+            else:
+                # A near miss has its edit distance set
+                results.append(("local", False, "close" if result.distance else ""))
+        state["results"] = results
+    
+    if state["results"]:
+        local = 0
+        for item, (source, correct, note) in zip(exercise["items"], state["results"]):
+            accepted = " / ".join(item["answers"])
+            local += source == "local"
+            if correct and note == "spelling":
+                st.success(f"✓ {item['prompt']} (exact: {accepted})")
+            elif correct:
+                st.success(f"✓ {item['prompt']}" + (f" ({note})" if note else ""))
+            elif correct is None:
+                st.warning(f"? {item['prompt']}: {note} Accepted: {accepted}")
+            elif note == "close":
+                st.error(f"✗ {item['prompt']}: almost, check the spelling: {accepted}")
+            else:
+                st.error(f"✗ {item['prompt']}: {accepted}" + (f" ({note})" if note else ""))
+        score = sum(1 for _, correct, _ in state["results"] if correct)
+        st.markdown(f"### Score: {score}/{len(state['results'])}")
+        st.caption(f"{local} of {len(state['results'])} answers graded instantly on this device")
 
 def parse_vocab_list(raw_text):
     """Parse vocabulary list from Gemini's response"""
@@ -103,56 +719,304 @@ def parse_vocab_list(raw_text):
         st.error(f"Error parsing vocabulary list: {e}")
         return []
 
-def generate_quiz(vocab_items, num_questions=5):
-    """Generate a quiz from vocabulary items"""
-    if not vocab_items or len(vocab_items) < 3:
+def generate_vocab(count, single_words=False):
+    """Generate count structured vocabulary entries for the current settings.
+
+    Words already in the vocab index that this learner hasn't seen are used
+    first; the model is only asked for the rest, told which words to leave
+    out and asked again (up to VOCAB_FILL_ROUNDS requests) while replies
+    still collide with words the learner knows.
+    """
+    entries = get_vocab_index().sample(target_language, skill_level, learning_focus, count,
+                                       exclude=learner_seen(), single_words=single_words)
+    return fill_vocab(entries, count, single_words)
+
+def fill_vocab(entries, count, single_words=False, exclude=()):
+    """entries topped up to count with generated words the learner doesn't know and that aren't in exclude.
+
+    Each request lists known words to leave out and asks for a few extra;
+    stops after VOCAB_FILL_ROUNDS requests or when a reply brings nothing new.
+    """
+    excluded = {fold(entry["word"]) for entry in exclude}
+    for _ in range(VOCAB_FILL_ROUNDS):
+        missing = count - len(entries)
+        if missing <= 0:
+            break
+        known = learner_seen() | excluded | {fold(entry["word"]) for entry in entries}
+        prompt = vocab_prompt(missing + VOCAB_EXTRA_WORDS, target_language, skill_level, learning_focus,
+                              single_words, avoid=avoid_list(known))
+        try:
+            raw = fresh_response(prompt, "vocab", VOCAB_GENERATION_CONFIG)
+        except GeminiError as e:
+            if not entries:
+                st.error(f"Gemini request failed: {e}")
+            break
+        merged = merge_vocab(entries, vocab_from_reply(raw), count, excluded)
+        if len(merged) == len(entries):
+            # Nothing new came back; asking again would only spend quota
+            break
+        entries = merged
+    return entries
+
+def avoid_list(known):
+    """Up to VOCAB_AVOID_LIMIT of the known folded words, a different sample on each call"""
+    return sorted(random.sample(sorted(known), min(VOCAB_AVOID_LIMIT, len(known))))
+
+def vocab_from_reply(raw):
+    """Parse a structured vocab reply, falling back to the line-based parser.
+
+    Repeated words (ignoring case and accents) are dropped.
+    """
+    entries = parse_vocab_json(raw)
+    if not entries:
+        entries = parse_vocab_list(raw)
+    unique = {}
+    for entry in entries:
+        unique.setdefault(fold(entry["word"]), entry)
+    return list(unique.values())
+
+def learner_seen():
+    """Folded words this learner has been shown in the current language"""
+    return st.session_state.seen_words.setdefault(target_language, set())
+
+def remember_vocab(entries):
+    """Add served entries to the global vocab index and this learner's seen set"""
+    get_vocab_index().add(target_language, skill_level, learning_focus, entries)
+    learner_seen().update(fold(entry["word"]) for entry in entries)
+    return entries
+
+def merge_vocab(entries, more, limit, excluded=()):
+    """entries plus the words in more that are new to entries, to this learner and
+    not among the folded excluded words, up to limit"""
+    known = learner_seen() | set(excluded) | {fold(entry["word"]) for entry in entries}
+    merged = list(entries)
+    for entry in more:
+        key = fold(entry["word"])
+        if len(merged) >= limit:
+            break
+        if key not in known:
+            known.add(key)
+            merged.append(entry)
+    return merged
+
+def generate_vocab_concurrently(target, exclude=()):
+    """Request vocabulary shards in parallel and merge them into target unique entries.
+
+    Unseen words from the vocab index are used first and only the gap is
+    generated. Each shard asks for a different kind of word
+    (VOCAB_SHARD_KINDS), so shards come back with different words. Results
+    are merged as they complete, deduplicated by folded word, and shards
+    still queued are cancelled once target is reached; if the merge still
+    falls short it is topped up with fill_vocab.
+    """
+    total = target
+    exclude_keys = learner_seen() | {fold(item["word"]) for item in exclude}
+    indexed = get_vocab_index().sample(target_language, skill_level, learning_focus, target, exclude=exclude_keys)
+    if len(indexed) >= target:
+        return indexed
+    target -= len(indexed)
+
+    shard_size = math.ceil(target / len(VOCAB_SHARD_KINDS)) + 2
+    avoid = avoid_list(exclude_keys | {fold(item["word"]) for item in indexed})
+    pool = get_generation_pool()
+    futures = []
+    for kind in VOCAB_SHARD_KINDS:
+        prompt = vocab_prompt(shard_size, target_language, skill_level, learning_focus, avoid=avoid, kind=kind)
+        futures.append(pool.submit(gemini_response, prompt, "vocab", VOCAB_GENERATION_CONFIG,
+                                   next_variant(prompt, VOCAB_GENERATION_CONFIG)))
+
+    seen = exclude_keys | {fold(item["word"]) for item in indexed}
+    merged = []
+    errors = []
+    for future in as_completed(futures):
+        try:
+            raw = future.result()
+        except GeminiError as e:
+            errors.append(e)
+            continue
+        for entry in vocab_from_reply(raw):
+            key = fold(entry["word"])
+            if key not in seen:
+                seen.add(key)
+                merged.append(entry)
+        if len(merged) >= target:
+            break
+
+    for future in futures:
+        future.cancel()
+    if not merged and not indexed and errors:
+        st.error(f"Gemini request failed: {errors[0]}")
         return []
-    
-    quiz = []
-    selected_items = random.sample(vocab_items, min(num_questions, len(vocab_items)))
-    
-    for item in selected_items:
-        question_type = random.choice(["multiple_choice", "fill_blank"])
-        
-        if question_type == "multiple_choice":
-            # Create wrong options
-            wrong_options = []
-            all_meanings = [v["meaning"] for v in vocab_items if v != item]
-            if len(all_meanings) >= 3:
-                wrong_options = random.sample(all_meanings, 3)
-            else:
-                wrong_options = all_meanings
-                
-            options = wrong_options + [item["meaning"]]
-            random.shuffle(options)
-            
-            quiz.append({
-                "type": "multiple_choice",
-                "question": f"What does '{item['word']}' mean?",
-                "options": options,
-                "correct_answer": item["meaning"]
-            })
-        else:
-            quiz.append({
-                "type": "fill_blank",
-                "question": f"Translate: {item['meaning']}",
-                "correct_answer": item["word"]
-            })
-    
-    return quiz
+    return fill_vocab(indexed + merged[:target], total, exclude=exclude)
+
+# Vocabulary batch size and single-word flag for each activity served from the pools
+GAME_VOCAB_SIZES = {"vocabulary": (10, False), "flashcards": (10, False), "word_match": (8, False), "hangman": (15, True)}
+
+def pack_vocab(count, single_words=False):
+    """Random sample of the offline pack's vocabulary for the current settings"""
+    if content_pack is None:
+        return []
+    entries = content_pack.vocab(target_language, skill_level, learning_focus)
+    if single_words:
+        entries = [entry for entry in entries if " " not in entry["word"].strip()]
+    return random.sample(entries, min(count, len(entries)))
+
+def prefetch_key(game):
+    return (target_language, skill_level, learning_focus, game)
+
+def schedule_prefetch(game):
+    """Start generating the next vocabulary batch for game in the background"""
+    prefetched = st.session_state.setdefault("prefetched_vocab", {})
+    key = prefetch_key(game)
+    if key in prefetched or content_pack is not None and content_pack.get(*key[:3], "vocab"):
+        return
+    # No need to spend quota on a private batch while the shared pool can serve one
+    if get_content_pool().available(key, st.session_state.setdefault("pool_seen", set())):
+        return
+    count, single_words = GAME_VOCAB_SIZES[game]
+    # Nor while the vocab index has enough words this learner hasn't seen
+    if get_vocab_index().available(*key[:3], exclude=learner_seen(), single_words=single_words) >= count:
+        return
+    prompt = vocab_prompt(count, target_language, skill_level, learning_focus, single_words)
+    variant = next_variant(prompt, VOCAB_GENERATION_CONFIG)
+    prefetched[key] = get_background_pool().submit(fetch_vocab_batch, prompt, variant)
+
+def fetch_vocab_batch(prompt, variant):
+    """Worker side of the prefetcher, must not touch Streamlit"""
+    try:
+        raw = gemini_response(prompt, "vocab", VOCAB_GENERATION_CONFIG, variant)
+    except GeminiError:
+        return []
+    return vocab_from_reply(raw)
+
+def take_vocab(game, inline=True):
+    """Serve a vocabulary batch for game without a model call whenever possible.
+
+    The offline content pack comes first, then sets from the shared content pool, then this session's
+    prefetched batch, and only then an inline generation (skipped when
+    inline is False, which returns an empty list instead). Batches generated
+    for this session seed the shared pool for everyone else, and each set
+    taken from the pool starts at most one background refill, so the pool
+    only grows as fast as it is used.
+    """
+    key = prefetch_key(game)
+    count, single_words = GAME_VOCAB_SIZES[game]
+    entries = pack_vocab(count, single_words)
+    if entries:
+        return remember_vocab(entries)
+    pool = get_content_pool()
+    seen = st.session_state.setdefault("pool_seen", set())
+    prompt = vocab_prompt(count, target_language, skill_level, learning_focus, single_words)
+
+    pooled = pool.take(key, seen)
+    if pooled is not None:
+        set_id, entries = pooled
+        seen.add(set_id)
+        pool.top_up(key, lambda sequence: fetch_vocab_batch(prompt, ("pool", sequence)), limit=1)
+        return remember_vocab(entries)
+
+    future = st.session_state.setdefault("prefetched_vocab", {}).pop(key, None)
+    entries = []
+    if future is not None:
+        try:
+            entries = future.result()
+        except Exception:
+            entries = []
+    if not entries and inline:
+        entries = generate_vocab(count, single_words)
+    if entries:
+        seen.add(pool.add(key, entries))
+    schedule_prefetch(game)
+    return remember_vocab(entries)
+
+def stream_vocab_into(deck, prompt, variant, stop):
+    """Worker side of streamed flashcard decks, must not touch Streamlit.
+
+    Appends each entry to deck as soon as the streamed reply completes it,
+    until the reply ends or stop is set.
+    """
+    seen = {fold(entry["word"]) for entry in deck}
+    received = []
+
+    def chunks():
+        for chunk in stream_response(prompt, "vocab", VOCAB_GENERATION_CONFIG, variant):
+            received.append(chunk)
+            yield chunk
+
+    for entry in iter_vocab_json(chunks()):
+        if stop.is_set():
+            return deck
+        key = fold(entry["word"])
+        if key not in seen:
+            seen.add(key)
+            deck.append(entry)
+    if not deck:
+        # Not JSON after all, fall back to the line-based parser
+        deck.extend(parse_vocab_list("".join(received)))
+    return deck
+
+def start_flashcard_stream():
+    """Start streaming a new flashcard deck into st.session_state.flashcards"""
+    stop_flashcard_stream()
+    count, single_words = GAME_VOCAB_SIZES["flashcards"]
+    prompt = vocab_prompt(count, target_language, skill_level, learning_focus, single_words)
+    deck = []
+    stop = threading.Event()
+    future = get_generation_pool().submit(stream_vocab_into, deck, prompt,
+                                          next_variant(prompt, VOCAB_GENERATION_CONFIG), stop)
+    st.session_state.flashcards = deck
+    st.session_state.current_card = 0
+    st.session_state.flashcard_stream = {"future": future, "stop": stop, "key": prefetch_key("flashcards")}
+
+def stop_flashcard_stream():
+    state = st.session_state.pop("flashcard_stream", None)
+    if state is not None:
+        state["stop"].set()
+
+def finish_flashcard_stream():
+    """Save a completely streamed deck and share it through the content pool"""
+    state = st.session_state.pop("flashcard_stream")
+    deck = st.session_state.flashcards
+    error = state["future"].exception()
+    if error is not None and not deck:
+        st.session_state.flashcard_stream_error = f"Gemini request failed: {error}"
+    if deck:
+        remember_vocab(deck)
+        st.session_state.setdefault("pool_seen", set()).add(get_content_pool().add(state["key"], list(deck)))
+        learner_store.save_deck(learner_id, target_language, skill_level, learning_focus, list(deck))
+
+def record_review(word, meaning, correct=False, quality=None):
+    """Feed a graded answer into the spaced-repetition scheduler"""
+    scheduler = st.session_state.scheduler
+    card_id = f"{target_language}:{word.casefold().strip()}"
+    scheduler.add(card_id, word, meaning)
+    review_card(card_id, quality if quality is not None else (4 if correct else 1))
+    learner_seen().add(fold(word))
+
+def review_card(card_id, quality):
+    """Grade a card in the learner's deck and persist its new schedule"""
+    card = st.session_state.scheduler.review(card_id, quality)
+    learner_store.save_card(learner_id, card)
+
+def record_game(game, score, total, detail=None):
+    learner_store.record_game(learner_id, target_language, skill_level, learning_focus, game, score, total, detail)
+
+if settings_changed:
+    # Batches prefetched for the old settings will never be served
+    prefetched = st.session_state.get("prefetched_vocab", {})
+    for key in [key for key in prefetched if key[:3] != (target_language, skill_level, learning_focus)]:
+        prefetched.pop(key).cancel()
+    st.session_state.hangman_vocab = None
+    stop_flashcard_stream()
 
 st.title("🌍 AI-Powered Language Learning (Gemini)")
 
 # Tabs for separating features
-tab1, tab2, tab4,tab5, tab6 = st.tabs([
-    "🧠 Vocabulary & Sentences",
-    "🗣️ Pronunciation",
-    "📝 Writing Practice",
-    "🎮 Quiz & Games",
-    "ℹ️ About"
-])
-
-with tab1:
+# Only the selected section's code runs on a rerun; st.tabs would run every tab,
+# model calls included, on every interaction
+section = st.radio("Section", SECTIONS, horizontal=True, key="section", label_visibility="collapsed")
+
+if section == "🧠 Vocabulary & Sentences":
     st.header("🧠 Personalized Vocabulary List")
     
     # Generate new vocab or use saved
@@ -160,62 +1024,62 @@ with tab1:
     
     with col1:
         if st.button("Generate New Vocabulary") or (settings_changed and st.session_state.vocab_list is None):
-            vocab_prompt = f"""Create a {skill_level.lower()} vocabulary list (10 words) for someone learning {target_language} with a focus on {learning_focus.lower()}. 
-            Include English meanings. Format each entry as 'word - meaning' for easy parsing."""
-            
-            vocab_response = gemini_response(vocab_prompt)
-            st.session_state.vocab_list = vocab_response
-            parsed_vocab = parse_vocab_list(vocab_response)
+            parsed_vocab = take_vocab("vocabulary")
+            st.session_state.vocab_list = format_vocab_markdown(parsed_vocab) if parsed_vocab else None
             st.session_state.flashcards = parsed_vocab
     
     with col2:
         if st.button("Save Vocabulary List"):
-            date_key = datetime.now().strftime("%Y-%m-%d %H:%M")
             if st.session_state.vocab_list:
-                st.session_state.saved_vocab[date_key] = {
-                    "text": st.session_state.vocab_list,
-                    "language": target_language,
-                    "level": skill_level,
-                    "focus": learning_focus
-                }
+                learner_store.save_vocab(learner_id, target_language, skill_level, learning_focus,
+                                         st.session_state.vocab_list, st.session_state.flashcards)
                 st.success("Vocabulary list saved!")
     
     # Display vocabulary
     if st.session_state.vocab_list:
         st.markdown(st.session_state.vocab_list)
     
+    with st.expander("🔎 Look up a word"):
+        lookup = st.text_input("Start typing a word (accents optional):", key="vocab_lookup")
+        if lookup:
+            matches = get_vocab_index().prefix(target_language, lookup)
+            if matches:
+                st.markdown(format_vocab_markdown(matches))
+            else:
+                st.caption(f"No {target_language} words starting with '{lookup}' have been generated yet.")
+    
     # Example sentences
     st.header("✍️ Example Sentences")
     
     if st.button("Generate Example Sentences"):
-        sentence_prompt = f"""Give 5 {skill_level.lower()} level example sentences in {target_language} with English translations.
-        These should be useful for someone focusing on {learning_focus.lower()} topics.
-        Format each as: 
-        - [Target Language Sentence]
-        - [English Translation]
-        (add a blank line between different examples)"""
-        
-        sentences = gemini_response(sentence_prompt)
-        st.markdown(sentences)
-
-    # Saved vocabulary
-    if st.session_state.saved_vocab:
+        sentences = show_content(sentences_prompt(target_language, skill_level, learning_focus), "sentences",
+                                 (target_language, skill_level, learning_focus, "sentences"))
+
+    # Saved vocabulary, paged from the learner store so only one page of headers is loaded
+    saved_count = learner_store.count_saved_vocab(learner_id)
+    if saved_count:
         st.header("📚 Saved Vocabulary Lists")
-        selected_date = st.selectbox("Select saved list", list(st.session_state.saved_vocab.keys()))
-        if selected_date:
-            saved_item = st.session_state.saved_vocab[selected_date]
+        pages = math.ceil(saved_count / SAVED_LISTS_PAGE_SIZE)
+        page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1) if pages > 1 else 1
+        headers = learner_store.saved_vocab_page(learner_id, (page - 1) * SAVED_LISTS_PAGE_SIZE, SAVED_LISTS_PAGE_SIZE)
+        selected = st.selectbox("Select saved list", headers,
+                                format_func=lambda h: f"{datetime.fromtimestamp(h['created']).strftime('%Y-%m-%d %H:%M')} · {h['language']} · {h['level']} · {h['focus']}")
+        if selected:
+            saved_item = learner_store.get_saved_vocab(learner_id, selected["id"])
             st.markdown(f"**Language:** {saved_item['language']} | **Level:** {saved_item['level']} | **Focus:** {saved_item['focus']}")
             st.markdown(saved_item['text'])
 
-with tab2:
+elif section == "🗣️ Pronunciation":
     st.header("🗣️ Pronunciation Guide")
     
     # Create tabs for different pronunciation features
-    pronun_tabs = st.tabs(["Learning Materials", "Interactive Tools", "Audio Lab", "Visual Aids"])
+    pronunciation_section = st.radio("Pronunciation section", ["Learning Materials", "Interactive Tools", "Audio Lab", "Visual Aids"],
+                                     horizontal=True, key="pronunciation_section", label_visibility="collapsed")
     
-    with pronun_tabs[0]:
+    if pronunciation_section == "Learning Materials":
         pronunciation_type = st.radio("Select pronunciation focus", 
-                                    ["General Tips", "Common Sounds", "Tongue Twisters", "Rhythm & Intonation", "Regional Accents"])
+                                    ["General Tips", "Common Sounds", "Tongue Twisters", "Rhythm & Intonation", "Regional Accents"],
+                                    key="pronunciation_type")
         
         if st.button("Generate Pronunciation Guide"):
             with st.spinner("Generating pronunciation content..."):
@@ -235,47 +1099,31 @@ with tab2:
                     pronounce_prompt = f"""Describe 3 major regional accents or dialects in {target_language}.
                     Highlight their key pronunciation differences, provide example words showing these differences, and explain where these accents are spoken."""
                     
-                pronunciation = gemini_response(pronounce_prompt)
-                st.markdown(pronunciation)
+                # Long-form guides are streamed one at a time rather than batched, so the
+                # first words show up at once; the response cache shares them across sessions
+                pronunciation = show_response(pronounce_prompt, "pronunciation_guide", stream=True)
         
         # Phonetic chart
         st.subheader("📊 Phonetic Chart")
         if st.button("Show Phonetic Chart"):
             with st.spinner("Generating phonetic chart..."):
-                phonetic_prompt = f"""Create a comprehensive phonetic chart for {target_language} showing all the main sounds.
-                For each sound, provide:
-                1. The IPA symbol
-                2. Example words in {target_language}
-                3. Closest English approximation if any
-                
-                Format this as a well-organized markdown table."""
-                
-                phonetic_chart = gemini_response(phonetic_prompt)
-                st.markdown(phonetic_chart)
+                phonetic_chart = show_content(phonetic_chart_prompt(target_language), "phonetic_chart",
+                                              (target_language, "*", "*", "phonetic_chart"), stream=True)
     
-    with pronun_tabs[1]:
+    elif pronunciation_section == "Interactive Tools":
         st.subheader("🔄 Interactive Pronunciation Tools")
         
         # Minimal pairs practice
         st.write("### Minimal Pairs Practice")
         if st.button("Generate Minimal Pairs"):
             with st.spinner("Generating minimal pairs..."):
-                minimal_pairs_prompt = f"""Create 5 sets of minimal pairs in {target_language} that {skill_level.lower()} learners often struggle with.
-                For each pair:
-                1. Show the two words
-                2. Provide their meanings
-                3. Explain the exact sound difference
-                4. Give a tip on distinguishing them
-                
-                Format this information clearly in markdown."""
-                
-                minimal_pairs = gemini_response(minimal_pairs_prompt)
-                st.markdown(minimal_pairs)
+                minimal_pairs = show_content(minimal_pairs_prompt(target_language, skill_level), "minimal_pairs",
+                                             (target_language, skill_level, "*", "minimal_pairs"), stream=True)
         
         # Sentence stress analyzer
         st.write("### Sentence Stress Analyzer")
         input_sentence = st.text_area("Enter a sentence in the target language to analyze its stress pattern:", 
-                                     placeholder=f"Type a sentence in {target_language} here...")
+                                     placeholder=f"Type a sentence in {target_language} here...", key="stress_sentence")
         
         if st.button("Analyze Stress Pattern") and input_sentence:
             with st.spinner("Analyzing stress pattern..."):
@@ -288,13 +1136,12 @@ with tab2:
                 2. Intonation pattern (rising, falling, etc.)
                 3. Tips for proper pronunciation"""
                 
-                stress_analysis = gemini_response(stress_prompt)
-                st.markdown(stress_analysis)
+                stress_analysis = show_response(stress_prompt, "stress")
         
         # Syllable breakdown tool
         st.write("### Syllable Breakdown Tool")
         word_to_break = st.text_input("Enter a word to break into syllables:", 
-                                     placeholder=f"Type a word in {target_language}...")
+                                     placeholder=f"Type a word in {target_language}...", key="syllable_word")
         
         if st.button("Break into Syllables") and word_to_break:
             with st.spinner("Breaking into syllables..."):
@@ -306,16 +1153,15 @@ with tab2:
                 3. Pronunciation guide for each syllable
                 4. Any special pronunciation rules that apply to this word"""
                 
-                syllable_breakdown = gemini_response(syllable_prompt)
-                st.markdown(syllable_breakdown)
+                syllable_breakdown = show_response(syllable_prompt, "syllables")
     
-    with pronun_tabs[2]:
+    elif pronunciation_section == "Audio Lab":
         st.subheader("🎵 Interactive Audio Lab")
         
         # Mock audio player with playback speed control
         st.write("### Audio Examples with Variable Speed")
         audio_type = st.selectbox("Choose audio example type:", 
-                                ["Common Phrases", "Difficult Sounds", "Pronunciation Drills", "Tone Patterns"])
+                                ["Common Phrases", "Difficult Sounds", "Pronunciation Drills", "Tone Patterns"], key="audio_type")
         
         speed_options = {0.5: "Slow (0.5x)", 0.75: "Slower (0.75x)", 1.0: "Normal (1.0x)", 1.25: "Faster (1.25x)"}
         playback_speed = st.select_slider("Playback Speed:", 
@@ -332,8 +1178,7 @@ with tab2:
                 2. English translation
                 3. Detailed pronunciation notes"""
                 
-                audio_examples = gemini_response(audio_prompt)
-                st.markdown(audio_examples)
+                audio_examples = show_response(audio_prompt, "audio")
                 
                 # Mock audio player UI
                 for i in range(3):
@@ -364,29 +1209,28 @@ with tab2:
             st.write("- Specific feedback on problem sounds")
             st.write("- Accuracy score and improvement suggestions")
     
-    with pronun_tabs[3]:
+    elif pronunciation_section == "Visual Aids":
         st.subheader("👁️ Visual Pronunciation Aids")
         
         # Language inputs
-        native_language = st.selectbox("Your Native Language:", ["English", "Hindi", "Mandarin", "Spanish", "Other"])
-        target_language = st.selectbox("Target Language:", ["English", "French", "German", "Japanese", "Other"])
+        native_language = st.selectbox("Your Native Language:", ["English", "Hindi", "Mandarin", "Spanish", "Other"], key="native_language")
+        visual_target_language = st.selectbox("Target Language:", ["English", "French", "German", "Japanese", "Other"], key="visual_target_language")
         
         # Articulation diagrams
         st.write("### Mouth & Tongue Position Diagrams")
         sound_to_show = st.selectbox("Select a sound to visualize:", 
-                                    ["Vowels", "Consonants", "Diphthongs", "Special Sounds"])
+                                    ["Vowels", "Consonants", "Diphthongs", "Special Sounds"], key="visual_sound")
         
         if st.button("Show Articulation Diagrams"):
             with st.spinner("Generating diagrams..."):
-                diagram_prompt = f"""Create a detailed explanation of how to position the mouth, tongue, and lips for {sound_to_show.lower()} in {target_language}.
+                diagram_prompt = f"""Create a detailed explanation of how to position the mouth, tongue, and lips for {sound_to_show.lower()} in {visual_target_language}.
                 
                 Include:
                 1. Step-by-step instructions for proper articulation
                 2. Common mistakes made by {native_language} speakers
                 3. Practice exercises focused on these specific sounds"""
                 
-                diagrams = gemini_response(diagram_prompt)
-                st.markdown(diagrams)
+                diagrams = show_response(diagram_prompt, "diagrams", stream=True)
                 
                 # Mock diagram display
                 st.write("Visualization would show cross-section diagrams of the mouth showing proper tongue and lip positions")
@@ -420,31 +1264,38 @@ with tab2:
             st.markdown(f"### IPA Symbol: [{symbol}]")
             
             with st.spinner("Generating information..."):
-                ipa_prompt = f"""Provide information about the IPA symbol [{symbol}] as it relates to {target_language} pronunciation.
+                ipa_prompt = f"""Provide information about the IPA symbol [{symbol}] as it relates to {visual_target_language} pronunciation.
                 
                 Include:
-                1. How it's pronounced in {target_language}
+                1. How it's pronounced in {visual_target_language}
                 2. Example words containing this sound
                 3. How it differs from similar sounds in English
                 4. Tips for mastering this sound"""
                 
-                ipa_info = gemini_response(ipa_prompt)
-                st.markdown(ipa_info)
-
-# Add this to your session state initialization code at the beginning of the app
-if 'selected_ipa' not in st.session_state:
-    st.session_state.selected_ipa = None
+                try:
+                    ipa_info = session_memo("ipa_info", (symbol, visual_target_language),
+                                            lambda: gemini_response(ipa_prompt, "ipa"))
+                    st.markdown(ipa_info)
+                except GeminiError as e:
+                    st.error(f"Gemini request failed: {e}")
+                    retry_memo_button("ipa_info")
 
-with tab4:
+elif section == "📝 Writing Practice":
     st.header("📝 Writing Practice")
     
     writing_type = st.selectbox("Writing Exercise Type", 
-                   ["Guided Composition", "Translation Exercise", "Fill in the Blanks", "Creative Writing"])
+                   ["Guided Composition", "Translation Exercise", "Fill in the Blanks", "Creative Writing"], key="writing_type")
     
     if writing_type == "Guided Composition":
         st.write(f"Write a short paragraph in {target_language} about one of these topics:")
-        topics = gemini_response(f"Generate 3 {skill_level.lower()} level writing topics for {target_language} students interested in {learning_focus.lower()}.")
-        st.markdown(topics)
+        topics_prompt = f"Generate 3 {skill_level.lower()} level writing topics for {target_language} students interested in {learning_focus.lower()}."
+        try:
+            topics = session_memo("writing_topics", (target_language, skill_level, learning_focus),
+                                  lambda: gemini_response(topics_prompt, "writing_topics"))
+            st.markdown(topics)
+        except GeminiError as e:
+            st.error(f"Gemini request failed: {e}")
+            retry_memo_button("writing_topics")
     
     elif writing_type == "Translation Exercise":
         if st.button("Generate Translation Exercise"):
@@ -452,8 +1303,8 @@ with tab4:
             Provide 3 sentences in English appropriate for {learning_focus.lower()} context.
             Then provide the correct {target_language} translations separately."""
             
-            translation_exercise = gemini_response(translation_prompt)
-            st.markdown(translation_exercise)
+            start_graded_exercise("translation", translation_prompt)
+        graded_exercise("translation")
     
     elif writing_type == "Fill in the Blanks":
         if st.button("Generate Fill-in-the-Blanks Exercise"):
@@ -461,109 +1312,168 @@ with tab4:
             related to {learning_focus.lower()} topics. 
             Provide a paragraph with 5 blanks, and list the correct answers separately."""
             
-            fill_exercise = gemini_response(fill_prompt)
-            st.markdown(fill_exercise)
+            start_graded_exercise("fill_blanks", fill_prompt)
+        graded_exercise("fill_blanks")
     
     elif writing_type == "Creative Writing":
         st.write(f"Write a creative piece in {target_language} based on this prompt:")
         if st.button("Generate Creative Writing Prompt"):
             creative_prompt = f"Generate a creative writing prompt for {skill_level.lower()} {target_language} students."
-            prompt_idea = gemini_response(creative_prompt)
-            st.markdown(prompt_idea)
+            prompt_idea = show_exercise("writing", "creative", creative_prompt, "creative", fresh=True)
     
     # Writing submission
-    user_writing = st.text_area("Your writing:", height=150)
+    user_writing = st.text_area("Your writing:", height=150, key="user_writing")
     
     if user_writing and st.button("Get Feedback"):
-        feedback_prompt = f"""Provide feedback on this {skill_level.lower()} {target_language} writing sample:
-        
-        "{user_writing}"
-        
-        Include:
-        1. Grammar corrections
-        2. Vocabulary suggestions
-        3. Style improvements
-        4. Overall assessment
-        
-        Be encouraging but thorough."""
-        
-        feedback = gemini_response(feedback_prompt)
         st.markdown("### Feedback")
-        st.markdown(feedback)
+        try:
+            with st.spinner("Checking your writing..."):
+                sentences, results, sent = sentence_feedback(user_writing)
+            st.markdown(merge_feedback(sentences, results))
+            reused = len(set(sentences)) - sent
+            if reused:
+                st.caption(f"Checked {sent} new or edited sentences, reused feedback for {reused} unchanged ones.")
+        except GeminiError as e:
+            st.error(f"Gemini request failed: {e}")
 
-with tab5:
+elif section == "🎮 Quiz & Games":
     st.header("🎮 Quiz & Games")
     
-    game_type = st.selectbox("Select Activity", ["Vocabulary Quiz", "Flashcards", "Word Match", "Hangman"])
+    game_type = st.selectbox("Select Activity", ["Vocabulary Quiz", "Flashcards", "Word Match", "Hangman", "Spaced Review"], key="game_type")
     
     if game_type == "Vocabulary Quiz":
         if st.button("Generate New Quiz") or (settings_changed and not st.session_state.quiz_questions):
-            # Generate vocabulary if needed
-            if not st.session_state.flashcards:
-                vocab_prompt = f"""Create a {skill_level.lower()} vocabulary list of 20 words for someone learning {target_language} with a focus on {learning_focus.lower()}. 
-                Include English meanings. Format each entry as 'word - meaning' for easy parsing."""
-                
-                vocab_response = gemini_response(vocab_prompt)
-                parsed_vocab = parse_vocab_list(vocab_response)
-                st.session_state.flashcards = parsed_vocab
-            
-            # Ensure we have enough vocabulary items
+            # Ensure we have enough vocabulary items: from the offline pack first, then in parallel shards
             if len(st.session_state.flashcards) < 20:
-                additional_prompt = f"""Create {20 - len(st.session_state.flashcards)} more {skill_level.lower()} vocabulary words for someone learning {target_language} with a focus on {learning_focus.lower()}. 
-                Include English meanings. Format each entry as 'word - meaning' for easy parsing."""
-                
-                additional_response = gemini_response(additional_prompt)
-                additional_vocab = parse_vocab_list(additional_response)
-                st.session_state.flashcards.extend(additional_vocab)
+                known = {fold(item["word"]) for item in st.session_state.flashcards}
+                pack_entries = [entry for entry in pack_vocab(40) if fold(entry["word"]) not in known]
+                st.session_state.flashcards = st.session_state.flashcards + pack_entries[:20 - len(st.session_state.flashcards)]
+            if len(st.session_state.flashcards) < 20:
+                additional_vocab = remember_vocab(generate_vocab_concurrently(20 - len(st.session_state.flashcards),
+                                                                              exclude=st.session_state.flashcards))
+                st.session_state.flashcards = st.session_state.flashcards + additional_vocab
             
             # Generate quiz from vocabulary - ensure 20 questions
-            st.session_state.quiz_questions = generate_quiz(st.session_state.flashcards, num_questions=20)
+            st.session_state.quiz_questions = generate_quiz(st.session_state.flashcards, num_questions=20,
+                                                           language=target_language)
+            # Grading keys for typed answers, computed once per quiz
+            st.session_state.quiz_keys = [
+                answer_key(question['correct_answer'], target_language) if question['type'] == 'fill_blank' else None
+                for question in st.session_state.quiz_questions
+            ]
             st.session_state.quiz_score = 0
             st.session_state.quiz_total = 0
+            # Answers typed for the previous quiz's questions
+            for key in [key for key in st.session_state if re.fullmatch(r"q\d+", key)]:
+                del st.session_state[key]
+            # Questions already scored and reviewed; checking again only shows the result
+            st.session_state.quiz_checked = set()
+        
+        # Each question is its own fragment, so answering one doesn't rerun the page
+        @st.fragment
+        def quiz_question(i, question):
+            st.markdown(f"### Question {i+1}: {question['question']}")
+            
+            if question['type'] == 'multiple_choice':
+                answer = st.radio(f"Select answer for question {i+1}:", 
+                                 options=question['options'],
+                                 key=f"q{i}")
+                correct = answer == question['correct_answer']
+                exact = correct
+                close = False
+            else:
+                answer = st.text_input(f"Your answer for question {i+1}:", key=f"q{i}")
+                # Accents, articles and transliteration are graded locally; typos are only close
+                result = grade(st.session_state.quiz_keys[i], answer, target_language)
+                correct, exact = result.correct, result.exact
+                close = not correct and result.distance is not None
+            
+            if st.button(f"Check Answer #{i+1}"):
+                if exact:
+                    st.success("Correct!")
+                elif correct:
+                    st.success(f"Correct! Exact spelling: {question['correct_answer']}")
+                elif close:
+                    st.warning(f"Almost! Check your spelling: the answer is {question['correct_answer']}")
+                else:
+                    st.error(f"Incorrect. The correct answer is: {question['correct_answer']}")
+                checked = st.session_state.setdefault("quiz_checked", set())
+                if i not in checked:
+                    checked.add(i)
+                    if correct:
+                        st.session_state.quiz_score += 1
+                    st.session_state.quiz_total += 1
+                    # An unaccented or article-less answer is a harder recall; a misspelling is a lapse, but a mild one
+                    quality = 2 if close else 3 if correct and not exact else None
+                    record_review(question['word'], question['meaning'], correct, quality=quality)
+                    learner_store.record_quiz_answer(learner_id, target_language, skill_level, learning_focus,
+                                                     question['word'], correct)
+                st.caption(f"Score: {st.session_state.quiz_score}/{st.session_state.quiz_total}")
         
         # Display quiz questions
         if st.session_state.quiz_questions:
             for i, question in enumerate(st.session_state.quiz_questions):
-                st.markdown(f"### Question {i+1}: {question['question']}")
-                
-                if question['type'] == 'multiple_choice':
-                    answer = st.radio(f"Select answer for question {i+1}:", 
-                                     options=question['options'],
-                                     key=f"q{i}")
-                    
-                    if st.button(f"Check Answer #{i+1}"):
-                        if answer == question['correct_answer']:
-                            st.success("Correct!")
-                            st.session_state.quiz_score += 1
-                        else:
-                            st.error(f"Incorrect. The correct answer is: {question['correct_answer']}")
-                        st.session_state.quiz_total += 1
-                        
-                elif question['type'] == 'fill_blank':
-                    answer = st.text_input(f"Your answer for question {i+1}:", key=f"q{i}")
-                    
-                    if st.button(f"Check Answer #{i+1}"):
-                        if answer.lower().strip() == question['correct_answer'].lower().strip():
-                            st.success("Correct!")
-                            st.session_state.quiz_score += 1
-                        else:
-                            st.error(f"Incorrect. The correct answer is: {question['correct_answer']}")
-                        st.session_state.quiz_total += 1
+                quiz_question(i, question)
             
             # Display score
             if st.session_state.quiz_total > 0:
                 st.markdown(f"### Score: {st.session_state.quiz_score}/{st.session_state.quiz_total}")
+            all_correct, all_answered = learner_store.quiz_totals(learner_id, target_language, skill_level, learning_focus)
+            if all_answered:
+                st.caption(f"All-time for these settings: {all_correct}/{all_answered} correct")
+        
+        # Bulk question bank export, built locally from the current vocabulary
+        if st.session_state.flashcards:
+            with st.expander("📤 Export question bank"):
+                bank_size = st.number_input("Number of questions", min_value=20, max_value=10000, value=500, step=100)
+                if st.button("Build Question Bank"):
+                    st.session_state.quiz_bank = generate_quiz(st.session_state.flashcards, num_questions=int(bank_size),
+                                                               language=target_language)
+                if st.session_state.get("quiz_bank"):
+                    bank = st.session_state.quiz_bank
+                    st.write(f"{len(bank)} questions ready")
+                    cols = st.columns(2)
+                    cols[0].download_button("Download JSON", quiz_to_json(bank), file_name="quiz_bank.json",
+                                            mime="application/json")
+                    cols[1].download_button("Download CSV", quiz_to_csv(bank), file_name="quiz_bank.csv",
+                                            mime="text/csv")
     
     elif game_type == "Flashcards":
-        if not st.session_state.flashcards or st.button("Generate New Flashcards"):
-            vocab_prompt = f"""Create a {skill_level.lower()} vocabulary list (10 words) for someone learning {target_language} with a focus on {learning_focus.lower()}. 
-            Include English meanings. Format each entry as 'word - meaning' for easy parsing."""
-            
-            vocab_response = gemini_response(vocab_prompt)
-            st.session_state.flashcards = parse_vocab_list(vocab_response)
+        streaming = st.session_state.get("flashcard_stream") is not None
+        if not st.session_state.flashcards and not streaming:
+            # Pick up where this learner left off before generating anything
+            st.session_state.flashcards = learner_store.latest_deck(learner_id, target_language, skill_level, learning_focus)
             st.session_state.current_card = 0
+        if (not st.session_state.flashcards and not streaming) or st.button("Generate New Flashcards"):
+            entries = take_vocab("flashcards", inline=False)
+            if entries:
+                stop_flashcard_stream()
+                st.session_state.flashcards = entries
+                st.session_state.current_card = 0
+                learner_store.save_deck(learner_id, target_language, skill_level, learning_focus, entries)
+            elif api_key:
+                # Nothing ready to serve: stream a new deck, cards show up as they are generated
+                start_flashcard_stream()
+                streaming = True
+        if "flashcard_stream_error" in st.session_state:
+            st.error(st.session_state.pop("flashcard_stream_error"))
+        schedule_prefetch("flashcards")
         
-        if st.session_state.flashcards:
+        # Navigating the deck only reruns this fragment; while a deck is
+        # streaming in, it also polls for newly arrived cards
+        @st.fragment(run_every=1.0 if streaming else None)
+        def flashcard_viewer():
+            stream = st.session_state.get("flashcard_stream")
+            if stream is not None and stream["future"].done():
+                finish_flashcard_stream()
+                # A full rerun redraws the page without polling
+                st.rerun()
+            
+            if not st.session_state.flashcards:
+                if stream is not None:
+                    st.info("Generating flashcards...")
+                return
+            
             # Flashcard navigation
             cols = st.columns([1, 3, 1])
             with cols[0]:
@@ -579,6 +1489,8 @@ with tab5:
             total = len(st.session_state.flashcards)
             
             st.markdown(f"### Flashcard {current + 1}/{total}")
+            if stream is not None:
+                st.caption("More cards are on the way...")
             
             card = st.session_state.flashcards[current]
             
@@ -587,15 +1499,16 @@ with tab5:
             
             if st.button("Reveal Meaning"):
                 st.markdown(f"### {card['meaning']}")
+        
+        if st.session_state.flashcards or streaming:
+            flashcard_viewer()
+        elif not api_key:
+            st.info("Enter your Gemini API key in the sidebar to generate flashcards.")
     
     elif game_type == "Word Match":
         if not st.session_state.get('word_match_generated', False) or st.button("Generate New Word Match"):
             # Generate vocabulary for matching if needed
-            vocab_prompt = f"""Create a {skill_level.lower()} vocabulary list (8 words) for someone learning {target_language} with a focus on {learning_focus.lower()}. 
-            Include English meanings. Format each entry as 'word - meaning' for easy parsing."""
-            
-            vocab_response = gemini_response(vocab_prompt)
-            match_vocab = parse_vocab_list(vocab_response)
+            match_vocab = take_vocab("word_match")
             
             # Create shuffled lists for matching
             target_words = [item['word'] for item in match_vocab]
@@ -614,8 +1527,11 @@ with tab5:
                 'score': 0
             }
             st.session_state.word_match_generated = True
+        schedule_prefetch("word_match")
         
-        if st.session_state.get('word_match', None):
+        # Picking meanings and checking answers only reruns this fragment
+        @st.fragment
+        def word_match_board():
             st.markdown("### Match the words with their meanings")
             st.markdown("Select the correct meaning for each word:")
             
@@ -636,50 +1552,61 @@ with tab5:
                 match_data['selected'][i] = selected_meaning
             
             if st.button("Check Answers"):
+                # Only the first check of a board is reviewed and recorded
+                first_check = not match_data['checked']
                 score = 0
                 for i, word in enumerate(match_data['words']):
                     correct_meaning = match_data['original_meanings'][i]
-                    if match_data['selected'][i] == correct_meaning:
+                    correct = match_data['selected'][i] == correct_meaning
+                    if correct:
                         st.success(f"✓ '{word}' correctly matched with '{correct_meaning}'")
                         score += 1
                     else:
                         st.error(f"✗ '{word}' should be matched with '{correct_meaning}'")
+                    if first_check:
+                        record_review(word, correct_meaning, correct=correct)
                 
                 st.session_state.word_match['checked'] = True
                 st.session_state.word_match['score'] = score
+                if first_check:
+                    record_game("word_match", score, len(match_data['words']))
                 
                 # Display score
                 st.markdown(f"### Score: {score}/{len(match_data['words'])}")
+        
+        if st.session_state.get('word_match', None):
+            word_match_board()
     
     elif game_type == "Hangman":
         # Initialize hangman game if needed
         if not st.session_state.get('hangman_initialized', False) or st.button("New Game"):
-            # Get a random word from target language vocabulary
+            # Get a random word from target language vocabulary, moving to a new batch once this one is used up
             if not st.session_state.get('hangman_vocab', None):
-                vocab_prompt = f"""Create a {skill_level.lower()} vocabulary list (15 words) for someone learning {target_language} with a focus on {learning_focus.lower()}. 
-                Include only single words (no phrases) with English meanings. Format each entry as 'word - meaning' for easy parsing."""
-                
-                vocab_response = gemini_response(vocab_prompt)
-                hangman_vocab = parse_vocab_list(vocab_response)
-                st.session_state.hangman_vocab = hangman_vocab
+                st.session_state.hangman_vocab = take_vocab("hangman")
             
             # Select a random word
-            import random
-            selected_item = random.choice(st.session_state.hangman_vocab)
-            
-            # Initialize game state
-            st.session_state.hangman = {
-                'word': selected_item['word'].lower(),
-                'meaning': selected_item['meaning'],
-                'guessed_letters': set(),
-                'max_attempts': 6,
-                'attempts': 0,
-                'game_over': False,
-                'won': False
-            }
-            st.session_state.hangman_initialized = True
+            if st.session_state.hangman_vocab:
+                selected_item = st.session_state.hangman_vocab.pop(random.randrange(len(st.session_state.hangman_vocab)))
+                
+                # Initialize game state; guesses are matched on accent-free letter keys
+                word = selected_item['word'].lower()
+                st.session_state.hangman = {
+                    'word': word,
+                    'meaning': selected_item['meaning'],
+                    'letters': {letter_key(char) for char in word if char.isalpha()},
+                    'keyboard': keyboard(word),
+                    'guessed_letters': set(),
+                    'max_attempts': 6,
+                    'attempts': 0,
+                    'game_over': False,
+                    'won': False
+                }
+                st.session_state.hangman_initialized = True
+        schedule_prefetch("hangman")
         
-        if st.session_state.get('hangman', None):
+        # Guesses only rerun the board and keyboard, not the whole app
+        @st.fragment
+        def hangman_board():
             game = st.session_state.hangman
             
             # Display current state
@@ -690,7 +1617,7 @@ with tab5:
             all_guessed = True
             
             for letter in game['word']:
-                if letter in game['guessed_letters'] or not letter.isalpha():
+                if letter_key(letter) in game['guessed_letters'] or not letter.isalpha():
                     display_word += letter + " "
                 else:
                     display_word += "_ "
@@ -779,12 +1706,22 @@ with tab5:
                 st.error(f"😢 Game over! The word was: {game['word']}")
                 game['game_over'] = True
             
+            if game['game_over'] and not game.get('reviewed'):
+                # Fewer wrong guesses means the word was recalled more easily
+                if game['won']:
+                    quality = 5 if game['attempts'] <= 1 else 4 if game['attempts'] <= 3 else 3
+                else:
+                    quality = 1
+                record_review(game['word'], game['meaning'], quality=quality)
+                record_game("hangman", int(game['won']), 1, {"word": game['word'], "wrong_guesses": game['attempts']})
+                game['reviewed'] = True
+            
             # Letter input if game is not over
             if not game['game_over']:
                 col1, col2 = st.columns([3, 1])
                 
                 with col1:
-                    letter = st.text_input("Guess a letter:", max_chars=1).lower()
+                    letter = letter_key(st.text_input("Guess a letter:", max_chars=1))
                 
                 with col2:
                     if st.button("Guess") and letter:
@@ -794,19 +1731,20 @@ with tab5:
                             else:
                                 game['guessed_letters'].add(letter)
                                 
-                                if letter not in game['word']:
+                                if letter not in game['letters']:
                                     game['attempts'] += 1
                                     if game['attempts'] >= game['max_attempts']:
                                         st.error(f"😢 Game over! The word was: {game['word']}")
                                         game['game_over'] = True
+                                rerun_fragment()
                         else:
                             st.warning("Please enter a valid letter.")
                 
-                # Also allow clicking on letters
+                # Also allow clicking on letters, from a keyboard for the word's own script
                 st.markdown("### Click to guess:")
-                alphabet = "abcdefghijklmnopqrstuvwxyz"
+                alphabet = game['keyboard']
                 
-                # Create 3 rows of letters
+                # Rows of up to 9 letters
                 for i in range(0, len(alphabet), 9):
                     cols = st.columns(min(9, len(alphabet) - i))
                     for j, col in enumerate(cols):
@@ -824,96 +1762,93 @@ with tab5:
                                 if current_letter not in game['guessed_letters']:
                                     game['guessed_letters'].add(current_letter)
                                     
-                                    if current_letter not in game['word']:
+                                    if current_letter not in game['letters']:
                                         game['attempts'] += 1
                                         if game['attempts'] >= game['max_attempts']:
                                             st.error(f"😢 Game over! The word was: {game['word']}")
                                             game['game_over'] = True
                                     
-                                    # Force page refresh to update UI
-                                    st.rerun()
-
-
-# Add this function to make sure we generate 20 questions
-def generate_quiz(vocabulary, num_questions=20):
-    """Generate quiz questions from vocabulary list."""
-    import random
-    
-    # Ensure we have enough vocabulary
-    if len(vocabulary) < num_questions:
-        # Just in case we don't have enough vocabulary items
-        return generate_quiz(vocabulary * (num_questions // len(vocabulary) + 1), num_questions)
-    
-    questions = []
-    words_used = set()
-    
-    # Make sure we have exactly the requested number of questions
-    while len(questions) < num_questions:
-        # Select unused vocabulary items for this question
-        available_items = [item for i, item in enumerate(vocabulary) if i not in words_used]
-        if not available_items:  # If we've used all vocabulary items, reset
-            words_used = set()
-            available_items = vocabulary
-            
-        item = random.choice(available_items)
-        words_used.add(vocabulary.index(item))
-        
-        # Randomly choose question type
-        question_type = random.choice(['multiple_choice', 'fill_blank'])
-        
-        if question_type == 'multiple_choice':
-            # Create multiple choice question
-            question_format = random.choice([
-                f"What is the meaning of '{item['word']}'?",
-                f"Which translation is correct for '{item['word']}'?"
-            ])
-            
-            # Generate options (including the correct answer)
-            options = [item['meaning']]
-            
-            # Add incorrect options
-            other_items = [v for v in vocabulary if v != item]
-            random.shuffle(other_items)
-            
-            for other_item in other_items[:3]:  # Add 3 distractors
-                if other_item['meaning'] not in options:
-                    options.append(other_item['meaning'])
-                if len(options) >= 4:
-                    break
-            
-            # If we couldn't get 4 unique options, add some variations
-            while len(options) < 4:
-                fake_meaning = random.choice(vocabulary)['meaning'] + " (modified)"
-                if fake_meaning not in options:
-                    options.append(fake_meaning)
-            
-            random.shuffle(options)
-            
-            questions.append({
-                'type': 'multiple_choice',
-                'question': question_format,
-                'options': options,
-                'correct_answer': item['meaning']
-            })
-            
-        elif question_type == 'fill_blank':
-            # Create fill-in-the-blank question
-            question_format = random.choice([
-                f"What is the {target_language} word for '{item['meaning']}'?",
-                f"Translate '{item['meaning']}' to {target_language}:"
-            ])
-            
-            questions.append({
-                'type': 'fill_blank',
-                'question': question_format,
-                'correct_answer': item['word']
-            })
-    
-    # Take exactly the number of questions requested (in case we generated extras)
-    return questions[:num_questions]
-
-
-with tab6:
+                                    # Redraw the board without rerunning the rest of the page
+                                    rerun_fragment()
+        
+        if st.session_state.get('hangman', None):
+            hangman_board()
+    
+    elif game_type == "Spaced Review":
+        scheduler = st.session_state.scheduler
+        card = scheduler.next_due()
+        
+        if not len(scheduler):
+            st.info("Answer quiz questions or play Word Match and Hangman to build your review deck.")
+        elif card is None:
+            next_card = scheduler.peek()
+            st.success(f"🎉 Nothing due right now. Next review: {datetime.fromtimestamp(next_card.due).strftime('%Y-%m-%d %H:%M')}")
+            st.caption(f"{len(scheduler)} words in your review deck")
+        else:
+            st.markdown(f"## {card.word}")
+            st.caption(f"Reviewed {card.reviews} times · ease {card.ease:.2f} · {len(scheduler)} words in your review deck")
+            
+            if st.button("Show Meaning"):
+                st.session_state.review_revealed = card.card_id
+            
+            if st.session_state.get("review_revealed") == card.card_id:
+                st.markdown(f"### {card.meaning}")
+                st.write("How well did you remember it?")
+                cols = st.columns(4)
+                for col, (label, quality) in zip(cols, [("Again", 1), ("Hard", 3), ("Good", 4), ("Easy", 5)]):
+                    if col.button(label, key=f"review_{quality}"):
+                        review_card(card.card_id, quality)
+                        st.session_state.review_revealed = None
+                        st.rerun()
+
+
+elif section == "💬 Conversation":
+    st.header("Conversation Practice")
+    history = st.session_state.chat_history
+    memory = st.session_state.chat_memory
+
+    with st.expander("Conversation settings"):
+        memory.token_budget = st.slider(
+            "History budget (tokens)", 500, 8000, step=250, key="chat_token_budget",
+            help="Older turns are summarized once the conversation sent with each message grows past this.")
+        if st.button("New Conversation"):
+            history.clear()
+            memory.reset()
+            st.session_state.chat_summary_job = None
+        st.caption(f"About {memory.context_tokens(history)} tokens of history are sent with each message"
+                   + (f"; the first {memory.start} turns are summarized." if memory.start else "."))
+
+    if client is None:
+        st.info("Enter your Gemini API key in the sidebar to practice conversation.")
+    elif not history:
+        st.write(f"Say hello in {target_language} to start a conversation about {learning_focus.lower()} topics. "
+                 "Your partner will point out mistakes as you go.")
+
+    for turn in history:
+        with st.chat_message("user" if turn["role"] == "user" else "assistant"):
+            st.markdown(turn["text"])
+
+    message = st.chat_input(f"Write in {target_language}...", disabled=client is None)
+    if message:
+        finish_chat_summary()
+        history.append({"role": "user", "text": message})
+        with st.chat_message("user"):
+            st.markdown(message)
+        reply = None
+        with st.chat_message("assistant"):
+            try:
+                reply = chat_reply(st.empty())
+            except GeminiError as e:
+                st.error(f"Gemini request failed: {e}")
+            finally:
+                # Keep user and partner turns alternating, also when a new message reruns the script mid-reply
+                if reply is None:
+                    history.pop()
+        if reply is not None:
+            history.append({"role": "model", "text": reply})
+            start_chat_summary()
+
+elif section == "ℹ️ About":
     st.markdown("""
     ## About this App
     
@@ -926,6 +1861,7 @@ with tab6:
     - Interactive conversation practice with AI
     - Writing exercises with feedback
     - Vocabulary quizzes and flashcards
+    - Spaced repetition reviews of the words you practice
     - Progress tracking and saved vocabulary lists
     
     ### How to use:
@@ -943,8 +1879,25 @@ with tab6:
     ### Future Enhancements:
     - Audio pronunciation examples
     - Speech recognition for pronunciation feedback
-    - Progress tracking and spaced repetition
+    - Progress tracking across devices
     - More interactive games and exercises
     
     Built with ❤️ using Streamlit + Gemini.
     """)
+
+if SHOW_ADMIN_PANEL:
+    # Rendered last so the numbers include the calls made during this rerun
+    with st.sidebar.expander("📊 Usage telemetry"):
+        summary = telemetry.summary()
+        if summary:
+            total_cost = sum(row["est. cost $"] for row in summary)
+            total_calls = sum(row["calls"] for row in summary)
+            st.caption(f"{total_calls} model calls, about ${total_cost:.4f} since "
+                       f"{datetime.fromtimestamp(telemetry.started):%Y-%m-%d %H:%M}")
+            st.dataframe(summary, hide_index=True)
+        else:
+            st.caption("No model calls yet.")
+        st.download_button("Prometheus metrics", telemetry.prometheus_text(),
+                           file_name="fluentflow_metrics.prom", mime="text/plain")
+        st.download_button("Recent calls (JSON lines)", telemetry.json_lines(),
+                           file_name="fluentflow_calls.jsonl", mime="application/x-ndjson")
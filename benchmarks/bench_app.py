@@ -0,0 +1,227 @@
+"""Offline benchmark of app.py with a fake Gemini backend.
+
+Drives the Streamlit script through AppTest along every main tab and button
+path and reports, per interaction, wall time, the number of model calls the
+rerun made and peak Python memory. The app is run from a temporary copy of
+the repository so its response cache and learner database start empty.
+
+    python benchmarks/bench_app.py
+    python benchmarks/bench_app.py --latency 0.5 --error-rate 0.1 --json bench.json
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from unittest import mock
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import fake_gemini  # noqa: E402
+
+
+def widget(widgets, label):
+    for candidate in widgets:
+        if candidate.label == label:
+            return candidate
+    raise LookupError(f"no widget labelled {label!r}")
+
+
+def click(label):
+    return lambda at: widget(at.button, label).click()
+
+
+def select(label, value):
+    return lambda at: widget(at.selectbox, label).select(value)
+
+
+def open_section(name):
+    return lambda at: widget(at.radio, "Section").set_value(name)
+
+
+def open_pronunciation_section(name):
+    return lambda at: widget(at.radio, "Pronunciation section").set_value(name)
+
+
+def idle(at):
+    pass
+
+
+def enter_api_key(at):
+    widget(at.sidebar.text_input, "Enter your Gemini API Key").input("fake-key")
+
+
+def answer_translation(at):
+    boxes = [box for box in at.text_input if box.key and box.key.startswith("translation_")]
+    if not boxes:
+        raise LookupError("no translation answer boxes")
+    boxes[0].input("respuesta 1")
+    if len(boxes) > 1:
+        boxes[1].input("algo completamente distinto pero respuesta")
+
+
+def write_and_submit(at):
+    widget(at.text_area, "Your writing:").input("Hola. Me llamo Ana. Vivo en Madrid y trabajo en una oficina.")
+
+
+def revise_writing(at):
+    widget(at.text_area, "Your writing:").input("Hola. Me llamo Ana. Vivo en Madrid y trabajo en un banco.")
+
+
+def answer_first_question(at):
+    question = at.session_state["quiz_questions"][0]
+    if question["type"] == "multiple_choice":
+        widget(at.radio, "Select answer for question 1:").set_value(question["correct_answer"])
+    else:
+        widget(at.text_input, "Your answer for question 1:").input(question["correct_answer"])
+
+
+def chat(text):
+    return lambda at: at.chat_input[0].set_value(text)
+
+
+def guess_letter(at):
+    for button in at.button:
+        if button.key and button.key.startswith("btn_") and not button.disabled:
+            button.click()
+            return
+    raise LookupError("no hangman letter left to guess")
+
+
+# (name, action) pairs; each action is one user interaction followed by a rerun
+SCENARIO = [
+    ("enter API key", enter_api_key),
+    ("idle rerun", idle),
+    ("generate vocabulary", click("Generate New Vocabulary")),
+    ("example sentences", click("Generate Example Sentences")),
+    ("pronunciation: open", open_section("🗣️ Pronunciation")),
+    ("pronunciation guide", click("Generate Pronunciation Guide")),
+    ("phonetic chart", click("Show Phonetic Chart")),
+    ("interactive tools: open", open_pronunciation_section("Interactive Tools")),
+    ("minimal pairs", click("Generate Minimal Pairs")),
+    ("visual aids: open", open_pronunciation_section("Visual Aids")),
+    ("articulation diagrams", click("Show Articulation Diagrams")),
+    ("writing: open", open_section("📝 Writing Practice")),
+    ("translation exercise: select", select("Writing Exercise Type", "Translation Exercise")),
+    ("translation exercise: generate", click("Generate Translation Exercise")),
+    ("translation exercise: answer", answer_translation),
+    ("translation exercise: check", click("Check Answers")),
+    ("writing: type text", write_and_submit),
+    ("writing feedback", click("Get Feedback")),
+    ("writing: revise one sentence", revise_writing),
+    ("writing feedback: revision", click("Get Feedback")),
+    ("games: open", open_section("🎮 Quiz & Games")),
+    ("quiz: generate", click("Generate New Quiz")),
+    ("quiz: answer", answer_first_question),
+    ("quiz: check answer", click("Check Answer #1")),
+    ("flashcards: open", select("Select Activity", "Flashcards")),
+    ("flashcards: next", click("Next →")),
+    ("flashcards: new deck", click("Generate New Flashcards")),
+    ("word match: open", select("Select Activity", "Word Match")),
+    ("word match: check", click("Check Answers")),
+    ("word match: new", click("Generate New Word Match")),
+    ("hangman: open", select("Select Activity", "Hangman")),
+    ("hangman: guess", guess_letter),
+    ("hangman: guess", guess_letter),
+    ("hangman: new game", click("New Game")),
+    ("spaced review: open", select("Select Activity", "Spaced Review")),
+    ("conversation: open", open_section("💬 Conversation")),
+] + [
+    (f"conversation: turn {n}", chat(f"Hola, hoy quiero hablar de mi trabajo y de mi familia, mensaje {n}."))
+    for n in range(1, 13)
+] + [
+    ("idle rerun", idle),
+]
+
+
+def run_scenario(app_path, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(app_path, default_timeout=timeout)
+    results = []
+    tracemalloc.start()
+
+    start = time.perf_counter()
+    at.run()
+    results.append(measure("first load", start, 0))
+
+    for name, action in SCENARIO:
+        try:
+            action(at)
+        except (LookupError, KeyError, IndexError) as e:
+            results.append({"interaction": name, "skipped": str(e)})
+            continue
+        calls_before = fake_gemini.BACKEND.calls
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        at.run()
+        results.append(measure(name, start, calls_before))
+        if at.exception:
+            results[-1]["exception"] = at.exception[0].message
+
+    tracemalloc.stop()
+    return results
+
+
+def measure(name, start, calls_before):
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    return {
+        "interaction": name,
+        "wall_ms": round(elapsed * 1000, 1),
+        "model_calls": fake_gemini.BACKEND.calls - calls_before,
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def print_table(results):
+    print(f"{'interaction':<34}{'wall ms':>10}{'calls':>7}{'peak KiB':>11}")
+    for row in results:
+        if "skipped" in row:
+            print(f"{row['interaction']:<34}  skipped: {row['skipped']}")
+            continue
+        print(f"{row['interaction']:<34}{row['wall_ms']:>10}{row['model_calls']:>7}{row['peak_kib']:>11}")
+        if "exception" in row:
+            print(f"    exception: {row['exception']}")
+    measured = [row for row in results if "wall_ms" in row]
+    print(f"{'total':<34}{round(sum(r['wall_ms'] for r in measured), 1):>10}"
+          f"{sum(r['model_calls'] for r in measured):>7}")
+    print(f"fake backend: {fake_gemini.BACKEND.calls} calls, {fake_gemini.BACKEND.errors} injected errors")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per fake model call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls failing with a 503")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=60.0, help="AppTest timeout per rerun")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    fake_gemini.BACKEND = fake_gemini.FakeBackend(args.latency, args.error_rate, args.seed)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # A fresh copy so the response cache, learner store and packs start empty
+        for name in os.listdir(REPO_DIR):
+            if name.endswith(".py"):
+                shutil.copy(os.path.join(REPO_DIR, name), workdir)
+        sys.path.insert(0, workdir)
+
+        with mock.patch("google.generativeai.GenerativeModel", fake_gemini.FakeGenerativeModel), \
+                mock.patch("google.ai.generativelanguage.GenerativeServiceClient", fake_gemini.FakeServiceClient), \
+                mock.patch("google.ai.generativelanguage.CacheServiceClient", fake_gemini.FakeCacheServiceClient):
+            results = run_scenario(os.path.join(workdir, "app.py"), args.timeout)
+
+    print_table(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Deterministic stand-in for google.generativeai.GenerativeModel.
+
+The fake answers every prompt locally after a configurable latency, fails a
+configurable fraction of calls with a retryable 503, and counts calls, so
+benchmarks can measure the app's own overhead without the network.
+"""
+import json
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+
+class FakeServiceUnavailable(Exception):
+    code = 503
+
+
+class FakeBackend:
+    def __init__(self, latency=0.0, error_rate=0.0, seed=0, chunk_size=40):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.chunk_size = chunk_size
+        self.calls = 0
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def configure(self, latency=None, error_rate=None):
+        if latency is not None:
+            self.latency = latency
+        if error_rate is not None:
+            self.error_rate = error_rate
+
+    def respond(self, prompt, generation_config=None):
+        prompt = prompt_text(prompt)
+        with self._lock:
+            self.calls += 1
+            call_number = self.calls
+            fail = self._rng.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise FakeServiceUnavailable("503 fake backend unavailable")
+        return canned_text(prompt, generation_config, call_number)
+
+
+def prompt_text(prompt):
+    """A chat's contents list as one string, so every prompt can be matched on text"""
+    if isinstance(prompt, str):
+        return prompt
+    return "\n".join(part for content in prompt for part in content["parts"])
+
+
+def canned_text(prompt, generation_config, call_number):
+    """Plausible output for the prompt's family, unique per call"""
+    config = generation_config or {}
+    if config.get("response_mime_type") == "application/json" and "Learner's answer" in prompt:
+        return json.dumps({"correct": call_number % 2 == 0, "explanation": "Fake verdict."})
+    if config.get("response_mime_type") == "application/json" and "Correct each sentence" in prompt:
+        sentences = re.findall(r"^\s*(s\d+): (.*)$", prompt, re.MULTILINE)
+        return json.dumps([
+            {"id": sentence_id, "corrected": sentence,
+             "issues": [{"category": "grammar", "note": f"Fake note {call_number}."}] if n % 2 else []}
+            for n, (sentence_id, sentence) in enumerate(sentences)
+        ])
+    if config.get("response_mime_type") == "application/json" and '"kind"' in prompt:
+        # Batched exercises: the prompt lists one "- kind: ..." line per kind
+        count = int(next(iter(re.findall(r"\b(\d+)\b", prompt)), 3))
+        kinds = re.findall(r"^\s*- (\w+):", prompt, re.MULTILINE)
+        return json.dumps([
+            {"kind": kind, "title": f"{kind} #{call_number}.{i}", "content": f"Fake {kind} exercise {i}.",
+             "items": [{"prompt": f"Item {n}", "answers": [f"respuesta {n}"]} for n in range(1, 4)]}
+            for kind in kinds for i in range(count)
+        ])
+    if config.get("response_mime_type") == "application/json":
+        count = int(next(iter(re.findall(r"\b(\d+)\b", prompt)), 10))
+        return json.dumps([
+            {"word": f"palabra{call_number}x{i}", "meaning": f"meaning {call_number}.{i}",
+             "part_of_speech": "noun", "example": f"Ejemplo {i}.", "ipa": f"pa'labɾa{i}"}
+            for i in range(count)
+        ])
+    if "vocabulary" in prompt and "word - meaning" in prompt:
+        return "\n".join(f"- palabra{call_number}x{i} - meaning {i}" for i in range(10))
+    lines = [f"## Fake response #{call_number}", ""]
+    lines += [f"{i}. Line {i} of a canned answer for: {prompt.split()[0]} ..." for i in range(1, 16)]
+    return "\n".join(lines)
+
+
+def usage_for(prompt, text):
+    prompt_tokens = len(prompt_text(prompt).split())
+    output_tokens = len(text.split())
+    return SimpleNamespace(prompt_token_count=prompt_tokens, candidates_token_count=output_tokens,
+                           total_token_count=prompt_tokens + output_tokens)
+
+
+BACKEND = FakeBackend()
+
+
+class FakeGenerativeModel:
+    """Accepts the same calls the app makes on GenerativeModel"""
+
+    def __init__(self, model_name="fake", **kwargs):
+        self.model_name = model_name
+        self._client = None
+
+    def generate_content(self, prompt, generation_config=None, stream=False, **kwargs):
+        if stream:
+            return self._stream(prompt, generation_config)
+        text = BACKEND.respond(prompt, generation_config)
+        return SimpleNamespace(text=text, usage_metadata=usage_for(prompt, text))
+
+    def _stream(self, prompt, generation_config):
+        text = BACKEND.respond(prompt, generation_config)
+        size = BACKEND.chunk_size
+        pieces = [text[i:i + size] for i in range(0, len(text), size)]
+        for i, piece in enumerate(pieces):
+            last = i == len(pieces) - 1
+            yield SimpleNamespace(text=piece, usage_metadata=usage_for(prompt, text) if last else None)
+
+
+class FakeServiceClient:
+    def __init__(self, *args, **kwargs):
+        self.transport = SimpleNamespace(close=lambda: None)
+
+
+class FakeCacheServiceClient:
+    """Context caching that always succeeds, handing out made-up cache names"""
+
+    def __init__(self, *args, **kwargs):
+        self.transport = SimpleNamespace(close=lambda: None)
+
+    def create_cached_content(self, cached_content=None, **kwargs):
+        return SimpleNamespace(name=f"cachedContents/fake-{random.randrange(10 ** 6)}")
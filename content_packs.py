@@ -0,0 +1,206 @@
+"""Precompiled offline content packs.
+
+A pack is a single binary file holding pre-generated vocabulary, example
+sentences, minimal pairs and phonetic charts for every sidebar combination.
+The app memory-maps it at startup and serves those paths without a model
+call, which also keeps them working when the API is unreachable.
+
+File layout (little endian):
+
+    header   magic b"FFPK", version u16, reserved u16, entry count u32
+    index    count x (key hash u64, offset u32, length u32), sorted by hash
+    strings  UTF-8 values, addressed by (offset, length) from the start of the table
+
+Keys are "language|level|focus|kind" with "*" for settings a kind doesn't
+depend on (e.g. the phonetic chart only depends on the language).
+
+Build a pack with:
+
+    python content_packs.py build --out packs/content.pack            # calls Gemini (GEMINI_API_KEY)
+    python content_packs.py build --out packs/content.pack --stub     # local placeholder content
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from prompts import (LANGUAGES, LEARNING_FOCUSES, SKILL_LEVELS, minimal_pairs_prompt,
+                     phonetic_chart_prompt, sentences_prompt)
+from vocab import VOCAB_GENERATION_CONFIG, parse_vocab_json, vocab_prompt
+
+MAGIC = b"FFPK"
+VERSION = 1
+HEADER = struct.Struct("<4sHHI")
+INDEX_ENTRY = struct.Struct("<QII")
+PACK_VOCAB_SIZE = 40
+
+
+def pack_key(language, level, focus, kind):
+    return f"{language}|{level}|{focus}|{kind}"
+
+
+def key_hash(key):
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class ContentPack:
+    """Read-only, memory-mapped view of a pack file"""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} content pack")
+        self._index_start = HEADER.size
+        self._strings_start = self._index_start + self.count * INDEX_ENTRY.size
+
+    def __len__(self):
+        return self.count
+
+    def get(self, language, level, focus, kind):
+        """Stored text for the key, or None. Binary search over the mapped index"""
+        target = key_hash(pack_key(language, level, focus, kind))
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            entry_hash, offset, length = INDEX_ENTRY.unpack_from(self._map, self._index_start + middle * INDEX_ENTRY.size)
+            if entry_hash < target:
+                low = middle + 1
+            elif entry_hash > target:
+                high = middle
+            else:
+                start = self._strings_start + offset
+                return self._map[start:start + length].decode("utf-8")
+        return None
+
+    def vocab(self, language, level, focus):
+        text = self.get(language, level, focus, "vocab")
+        return json.loads(text) if text else []
+
+    def close(self):
+        self._map.close()
+
+
+def write_pack(path, items):
+    """Write {key: text} items as a pack file"""
+    table = bytearray()
+    index = []
+    for key, text in items.items():
+        data = text.encode("utf-8")
+        index.append((key_hash(key), len(table), len(data)))
+        table += data
+    index.sort()
+    hashes = [entry[0] for entry in index]
+    if len(set(hashes)) != len(hashes):
+        raise ValueError("Key hash collision, cannot build pack")
+
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(index)))
+        for entry in index:
+            f.write(INDEX_ENTRY.pack(*entry))
+        f.write(table)
+    os.replace(path + ".tmp", path)
+
+
+def pack_jobs(languages=LANGUAGES, levels=SKILL_LEVELS, focuses=LEARNING_FOCUSES):
+    """(key, kind, prompt, generation_config) for everything a pack holds"""
+    for language in languages:
+        yield pack_key(language, "*", "*", "phonetic_chart"), "phonetic_chart", phonetic_chart_prompt(language), None
+        for level in levels:
+            yield (pack_key(language, level, "*", "minimal_pairs"), "minimal_pairs",
+                   minimal_pairs_prompt(language, level), None)
+            for focus in focuses:
+                yield (pack_key(language, level, focus, "vocab"), "vocab",
+                       vocab_prompt(PACK_VOCAB_SIZE, language, level, focus), VOCAB_GENERATION_CONFIG)
+                yield (pack_key(language, level, focus, "sentences"), "sentences",
+                       sentences_prompt(language, level, focus), None)
+
+
+def stub_generate(key, kind, prompt, generation_config):
+    """Deterministic placeholder content, for building packs without an API key"""
+    language, level, focus, _ = key.split("|")
+    if kind == "vocab":
+        return json.dumps([
+            {"word": f"{language.lower()}-{focus.lower()}-{i}", "meaning": f"{focus.lower()} word {i}",
+             "part_of_speech": "noun", "example": "", "ipa": ""}
+            for i in range(PACK_VOCAB_SIZE)
+        ])
+    settings = ", ".join(value for value in (level, focus) if value != "*")
+    return f"*Offline {kind.replace('_', ' ')} for {language}{f' ({settings})' if settings else ''}.*"
+
+
+def gemini_generator(api_key, model_name="gemini-2.0-flash", requests_per_minute=60):
+    """Generation function that calls Gemini through the app's client layer"""
+    import google.generativeai as genai
+    from gemini_client import GeminiClient, TokenBucket
+
+    genai.configure(api_key=api_key)
+    client = GeminiClient(genai.GenerativeModel(model_name),
+                          TokenBucket(requests_per_minute / 60, max(1, requests_per_minute // 6)),
+                          threading.BoundedSemaphore(8))
+
+    def generate(key, kind, prompt, generation_config):
+        text = client.generate(prompt, generation_config).text
+        if kind == "vocab":
+            # Store the validated entries, not the raw reply
+            text = json.dumps(parse_vocab_json(text), ensure_ascii=False)
+        return text
+
+    return generate
+
+
+def build(out, generate, workers=8):
+    jobs = list(pack_jobs())
+    items = {}
+    failures = 0
+
+    def run(job):
+        key, kind, prompt, generation_config = job
+        return key, generate(key, kind, prompt, generation_config)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run, job) for job in jobs]
+        for done, future in enumerate(futures, 1):
+            try:
+                key, text = future.result()
+                items[key] = text
+            except Exception as e:
+                failures += 1
+                print(f"  failed: {jobs[done - 1][0]}: {e}", file=sys.stderr)
+            if done % 50 == 0 or done == len(jobs):
+                print(f"{done}/{len(jobs)} generated")
+
+    write_pack(out, items)
+    print(f"Wrote {len(items)} entries to {out} ({failures} failed)")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build offline content packs for the language learning app")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="generate every pack entry and write the pack file")
+    build_parser.add_argument("--out", default=os.path.join("packs", "content.pack"))
+    build_parser.add_argument("--stub", action="store_true", help="use local placeholder content instead of Gemini")
+    build_parser.add_argument("--api-key", default=os.environ.get("GEMINI_API_KEY"))
+    build_parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    if args.stub:
+        generate = stub_generate
+    elif args.api_key:
+        generate = gemini_generator(args.api_key)
+    else:
+        parser.error("pass --api-key (or set GEMINI_API_KEY), or use --stub")
+    return 1 if build(args.out, generate, args.workers) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
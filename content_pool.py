@@ -0,0 +1,102 @@
+"""Process-wide pool of generated content shared by every session.
+
+Sets of generated content (vocabulary batches, exercises) are kept per
+settings key and handed out at random to sessions that have not seen them
+yet. Each set is retired after a number of uses, and the pool refills itself
+in the background, so most sessions are served without a model call while
+learners still see fresh material over time.
+"""
+import copy
+import itertools
+import random
+import threading
+
+
+class PooledSet:
+    __slots__ = ("set_id", "item", "uses")
+
+    def __init__(self, set_id, item):
+        self.set_id = set_id
+        self.item = item
+        self.uses = 0
+
+
+class ContentPool:
+    """Thread-safe, bounded pool of content sets keyed by settings"""
+
+    def __init__(self, executor, capacity=4, max_uses=25):
+        self.executor = executor
+        self.capacity = capacity
+        self.max_uses = max_uses
+        self._lock = threading.Lock()
+        self._sets = {}
+        self._pending = {}
+        self._sequence = {}
+        self._ids = itertools.count(1)
+        self.stats = {"served": 0, "misses": 0, "produced": 0, "retired": 0}
+
+    def available(self, key, seen=()):
+        """Number of sets for key that a session with these seen ids could get"""
+        with self._lock:
+            return sum(1 for pooled in self._sets.get(key, []) if pooled.set_id not in seen)
+
+    def take(self, key, seen=()):
+        """Return (set_id, copy of item) for a set not in seen, or None"""
+        with self._lock:
+            candidates = [pooled for pooled in self._sets.get(key, []) if pooled.set_id not in seen]
+            if not candidates:
+                self.stats["misses"] += 1
+                return None
+            pooled = random.choice(candidates)
+            pooled.uses += 1
+            if pooled.uses >= self.max_uses:
+                self._sets[key].remove(pooled)
+                self.stats["retired"] += 1
+            self.stats["served"] += 1
+            # Sessions mutate what they get (e.g. popping hangman words)
+            return pooled.set_id, copy.deepcopy(pooled.item)
+
+    def add(self, key, item):
+        """Add a generated set to the pool and return its id"""
+        with self._lock:
+            return self._add(key, item)
+
+    def top_up(self, key, producer, limit=None):
+        """Generate sets in the background towards capacity for key, at most
+        limit of them (None for all that are missing).
+
+        producer is called on a worker thread with a per-key sequence number
+        and returns the new item, or a falsy value on failure.
+        """
+        with self._lock:
+            missing = self.capacity - len(self._sets.get(key, [])) - self._pending.get(key, 0)
+            if limit is not None:
+                missing = min(missing, limit)
+            if missing <= 0:
+                return
+            self._pending[key] = self._pending.get(key, 0) + missing
+            start = self._sequence.get(key, 0)
+            self._sequence[key] = start + missing
+        for sequence in range(start, start + missing):
+            self.executor.submit(self._produce, key, producer, sequence)
+
+    def _produce(self, key, producer, sequence):
+        item = None
+        try:
+            item = producer(sequence)
+        finally:
+            with self._lock:
+                self._pending[key] -= 1
+                if item:
+                    self._add(key, item)
+                    self.stats["produced"] += 1
+
+    def _add(self, key, item):
+        pooled = PooledSet(next(self._ids), item)
+        sets = self._sets.setdefault(key, [])
+        sets.append(pooled)
+        if len(sets) > self.capacity:
+            # Make room by dropping the set that has been served the most
+            sets.remove(max(sets, key=lambda s: s.uses))
+            self.stats["retired"] += 1
+        return pooled.set_id
@@ -0,0 +1,85 @@
+"""Conversation practice with a bounded context.
+
+The full transcript is kept for display, but the model only ever sees the
+system preamble, a rolling summary of older turns and the most recent
+turns. Once the estimated size of summary plus recent turns passes the
+token budget, the older turns are folded into the summary by a separate
+(small) model call, so the cost of a turn stays flat however long the
+conversation runs.
+"""
+
+# Replies are kept short, so a single turn can't run up the bill either
+CHAT_GENERATION_CONFIG = {"max_output_tokens": 400}
+
+
+def system_preamble(language, level, focus):
+    """System instruction for a practice partner at these settings"""
+    return f"""You are a friendly conversation partner helping a {level.lower()} learner practice {language}.
+    Keep the conversation on everyday and {focus.lower()} topics and reply mostly in {language},
+    using vocabulary and grammar suited to a {level.lower()} learner. Keep replies short (2-4 sentences)
+    and end with a question that keeps the conversation going.
+    When the learner makes a mistake, first reply naturally, then add one line starting with "✏️" that gives
+    the corrected phrase and a brief explanation in English. If the learner writes in English, help them say it
+    in {language}."""
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token) for budgeting"""
+    return len(text) // 4 + 1
+
+
+def summary_prompt(language, previous_summary, turns):
+    """Prompt folding turns into the running summary"""
+    transcript = "\n".join(f"    {'Learner' if turn['role'] == 'user' else 'Partner'}: {turn['text']}" for turn in turns)
+    earlier = f"\n    Summary so far: {previous_summary}" if previous_summary else ""
+    return f"""Summarize this {language} practice conversation for the partner to continue it later.{earlier}
+    New turns:
+{transcript}
+    In at most 120 words of English, keep the topics discussed, facts the learner shared about themselves,
+    and mistakes they made repeatedly. Don't add anything that wasn't said."""
+
+
+class ChatMemory:
+    """Which part of a transcript the model sees, kept under token_budget.
+
+    history is the full list of {"role": "user" | "model", "text": ...}
+    turns; turns before self.start are represented by self.summary.
+    """
+
+    def __init__(self, token_budget=2000, keep_recent=6):
+        self.token_budget = token_budget
+        self.keep_recent = keep_recent
+        self.summary = ""
+        self.start = 0
+
+    def context_tokens(self, history):
+        return estimate_tokens(self.summary) + sum(estimate_tokens(turn["text"]) for turn in history[self.start:])
+
+    def to_fold(self, history):
+        """Turns that should be folded into the summary, or [] while under budget"""
+        if self.context_tokens(history) <= self.token_budget:
+            return []
+        end = len(history) - self.keep_recent
+        # Turns alternate starting with the learner; keep the recent ones starting on a learner turn
+        end -= end % 2
+        return history[self.start:max(self.start, end)]
+
+    def fold(self, summary, upto):
+        """Replace the turns before upto with summary"""
+        if upto > self.start:
+            self.summary = summary
+            self.start = upto
+
+    def contents(self, history):
+        """Gemini contents for the next reply: the summary, then the recent turns"""
+        contents = []
+        if self.summary:
+            contents.append({"role": "user", "parts": [f"(Summary of our conversation so far: {self.summary})"]})
+            contents.append({"role": "model", "parts": ["Understood, let's continue."]})
+        for turn in history[self.start:]:
+            contents.append({"role": turn["role"], "parts": [turn["text"]]})
+        return contents
+
+    def reset(self):
+        self.summary = ""
+        self.start = 0
@@ -0,0 +1,167 @@
+"""Batched exercise generation.
+
+Instead of one model call per "Generate ..." click, a single structured
+request asks for several exercises of every kind in a group (the short
+writing exercises). The reply is split into typed items and queued per
+settings, so the following clicks are served from the queue until it runs
+dry.
+
+Translation and fill-in-the-blanks exercises also come with structured
+answer keys (each sentence or blank with every accepted answer), so the
+learner's answers can be graded locally; the model is only asked about
+answers the local grader can't decide.
+"""
+import json
+from collections import deque
+
+from vocab import SchemaError, compile_schema, strip_code_fence
+
+# What each kind of exercise should contain, filled in with the learner's settings
+EXERCISE_KINDS = {
+    "translation": "a translation exercise from English to {language}: 3 sentences in English appropriate for a "
+                   "{focus} context. Put each English sentence in \"items\" as \"prompt\" with every acceptable "
+                   "{language} translation in \"answers\", and keep the translations out of \"content\"",
+    "fill_blanks": "a fill-in-the-blanks exercise in {language} related to {focus} topics: a paragraph with 5 "
+                   "blanks written as ___(1)___ to ___(5)___ in \"content\". List each blank in \"items\" with its "
+                   "number as \"prompt\" and every word that fits it in \"answers\"; keep the answers out of \"content\"",
+    "creative": "a creative writing prompt for {level} {language} students",
+}
+
+# Kinds whose items carry answers that can be graded
+GRADED_KINDS = ("translation", "fill_blanks")
+
+EXERCISE_GROUPS = {
+    "writing": ("translation", "fill_blanks", "creative"),
+}
+
+EXERCISE_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "kind": {"type": "STRING"},
+            "title": {"type": "STRING"},
+            "content": {"type": "STRING"},
+            "items": {
+                "type": "ARRAY",
+                "items": {
+                    "type": "OBJECT",
+                    "properties": {
+                        "prompt": {"type": "STRING"},
+                        "answers": {"type": "ARRAY", "items": {"type": "STRING"}},
+                    },
+                    "required": ["prompt", "answers"],
+                },
+            },
+        },
+        "required": ["kind", "content"],
+    },
+}
+
+EXERCISE_GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": EXERCISE_SCHEMA,
+}
+
+check_exercise = compile_schema(EXERCISE_SCHEMA["items"])
+
+ANSWER_CHECK_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "correct": {"type": "BOOLEAN"},
+        "explanation": {"type": "STRING"},
+    },
+    "required": ["correct"],
+}
+
+ANSWER_CHECK_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": ANSWER_CHECK_SCHEMA,
+}
+
+check_answer_check = compile_schema(ANSWER_CHECK_SCHEMA)
+
+
+def batch_prompt(kinds, count, language, level, focus):
+    """Prompt for count exercises of each kind in one JSON reply"""
+    settings = {"language": language, "level": level.lower(), "focus": focus.lower()}
+    lines = "\n".join(f"    - {kind}: {EXERCISE_KINDS[kind].format(**settings)}" for kind in kinds)
+    return f"""Create {count} different exercises of each kind below for a {level.lower()} learner of {language}
+    focusing on {focus.lower()} topics.
+{lines}
+    Return a JSON array. For each exercise give its "kind" (exactly one of the ids above), a short "title"
+    and the full exercise as markdown in "content"."""
+
+
+def parse_exercises(raw_text, kinds):
+    """Split a batched reply into {kind: [exercise, ...]}, dropping invalid or unknown items.
+
+    Each exercise is a dict with "title", "content" and "items", the list of
+    {"prompt", "answers"} answer keys (empty for kinds that aren't graded).
+    """
+    grouped = {kind: [] for kind in kinds}
+    try:
+        data = json.loads(strip_code_fence(raw_text))
+    except ValueError:
+        return grouped
+    if isinstance(data, dict):
+        data = next((v for v in data.values() if isinstance(v, list)), [])
+    if not isinstance(data, list):
+        return grouped
+
+    for item in data:
+        try:
+            item = check_exercise(item)
+        except SchemaError:
+            continue
+        kind = item["kind"].strip().lower()
+        if kind in grouped:
+            answers = [entry for entry in item.get("items", []) if any(entry["answers"])]
+            grouped[kind].append({
+                "title": item.get("title", ""),
+                "content": item["content"],
+                "items": answers if kind in GRADED_KINDS else [],
+            })
+    return grouped
+
+
+def exercise_markdown(exercise):
+    if exercise["title"]:
+        return f"### {exercise['title']}\n\n{exercise['content']}"
+    return exercise["content"]
+
+
+def answer_check_prompt(language, prompt, answers, response):
+    """Ask whether a learner's answer the local grader couldn't decide is acceptable"""
+    accepted = "; ".join(answers)
+    return f"""A learner of {language} answered an exercise item.
+    Item: {prompt}
+    Accepted answers: {accepted}
+    Learner's answer: {response}
+    Is the learner's answer an acceptable {language} answer with the same meaning, allowing for minor spelling
+    mistakes? Return JSON with "correct" (true or false) and a one-sentence "explanation" in English."""
+
+
+def parse_answer_check(raw_text):
+    """(correct, explanation) from an answer check reply, or None if it can't be read"""
+    try:
+        data = check_answer_check(json.loads(strip_code_fence(raw_text)))
+    except ValueError:
+        return None
+    return data["correct"], data.get("explanation", "")
+
+
+class ExerciseQueue:
+    """Exercises waiting to be shown, keyed by (settings, kind)"""
+
+    def __init__(self):
+        self._queues = {}
+
+    def add(self, key, grouped):
+        for kind, items in grouped.items():
+            self._queues.setdefault((key, kind), deque()).extend(items)
+
+    def pop(self, key, kind):
+        """Next exercise of kind for key, or None if there are none left"""
+        queue = self._queues.get((key, kind))
+        return queue.popleft() if queue else None
@@ -0,0 +1,144 @@
+"""Sentence-level writing feedback.
+
+The learner's text is split into sentences and each sentence is corrected
+on its own, so its result can be cached under a hash of (language, level,
+sentence). When a revised text is submitted again only new or edited
+sentences are sent to the model, in one structured request; everything
+else is reused. The per-sentence results are then merged locally into the
+corrected text and an overall assessment.
+"""
+import hashlib
+import json
+import re
+
+from vocab import SchemaError, compile_schema, strip_code_fence
+
+# Sentence ends: Latin/Cyrillic punctuation followed by a space, CJK full stops, or line breaks
+SENTENCE_END = re.compile(r"(?<=[.!?…])\s+|(?<=[。！？])|\n+")
+
+ISSUE_CATEGORIES = ("grammar", "vocabulary", "spelling", "style")
+
+FEEDBACK_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "id": {"type": "STRING"},
+            "corrected": {"type": "STRING"},
+            "issues": {
+                "type": "ARRAY",
+                "items": {
+                    "type": "OBJECT",
+                    "properties": {
+                        "category": {"type": "STRING"},
+                        "note": {"type": "STRING"},
+                    },
+                    "required": ["note"],
+                },
+            },
+        },
+        "required": ["id", "corrected"],
+    },
+}
+
+FEEDBACK_GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": FEEDBACK_SCHEMA,
+}
+
+check_sentence_feedback = compile_schema(FEEDBACK_SCHEMA["items"])
+
+
+def split_sentences(text):
+    """Sentences of text, in order, with surrounding whitespace removed"""
+    return [sentence.strip() for sentence in SENTENCE_END.split(text) if sentence.strip()]
+
+
+def sentence_key(language, level, sentence):
+    """Cache key for the feedback on one sentence"""
+    payload = json.dumps({"feedback": " ".join(sentence.split()), "language": language, "level": level},
+                         sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def feedback_prompt(language, level, sentences):
+    """Prompt for corrections of [(id, sentence), ...] in one JSON reply"""
+    listed = "\n".join(f"    {sentence_id}: {sentence}" for sentence_id, sentence in sentences)
+    categories = ", ".join(ISSUE_CATEGORIES)
+    return f"""You are correcting sentences written by a {level.lower()} learner of {language}.
+    Correct each sentence below on its own:
+{listed}
+    Return a JSON array with one object per sentence: its "id", the "corrected" sentence (unchanged if it
+    is already correct) and a list of "issues", each with a "category" ({categories}) and a short,
+    encouraging "note" in English explaining the correction. Use an empty list for correct sentences."""
+
+
+def parse_feedback(raw_text, ids):
+    """{id: {"corrected", "issues"}} for the requested ids found in the reply"""
+    try:
+        data = json.loads(strip_code_fence(raw_text))
+    except ValueError:
+        return {}
+    if isinstance(data, dict):
+        data = next((v for v in data.values() if isinstance(v, list)), [])
+    if not isinstance(data, list):
+        return {}
+
+    wanted = set(ids)
+    results = {}
+    for item in data:
+        try:
+            item = check_sentence_feedback(item)
+        except SchemaError:
+            continue
+        if item["id"] in wanted:
+            issues = []
+            for issue in item.get("issues", []):
+                category = issue.get("category", "").lower()
+                issues.append({"category": category if category in ISSUE_CATEGORIES else "style",
+                               "note": issue["note"]})
+            results[item["id"]] = {"corrected": item["corrected"], "issues": issues}
+    return results
+
+
+def merge_feedback(sentences, results):
+    """Markdown feedback for the whole text from per-sentence results.
+
+    results maps sentence text to its result; sentences without one are
+    reported as not checked.
+    """
+    corrections = []
+    unchecked = 0
+    counts = dict.fromkeys(ISSUE_CATEGORIES, 0)
+    corrected_text = []
+    for number, sentence in enumerate(sentences, 1):
+        result = results.get(sentence)
+        if result is None:
+            unchecked += 1
+            corrected_text.append(sentence)
+            continue
+        corrected_text.append(result["corrected"])
+        if result["issues"] or result["corrected"].strip() != sentence:
+            lines = [f"**{number}.** ~~{sentence}~~  \n→ {result['corrected']}"]
+            for issue in result["issues"]:
+                counts[issue["category"]] += 1
+                lines.append(f"- *{issue['category']}*: {issue['note']}")
+            corrections.append("\n".join(lines))
+
+    checked = len(sentences) - unchecked
+    parts = ["#### Corrections"]
+    parts.append("\n\n".join(corrections) if corrections else "No corrections needed. Well done!")
+    parts.append("#### Overall assessment")
+    summary = f"{checked - len(corrections)} of {checked} sentences were already correct."
+    found = [f"{count} {category}" for category, count in counts.items() if count]
+    if found:
+        summary += f" Issues found: {', '.join(found)}."
+        main = max(counts, key=counts.get)
+        summary += f" Focus your next revision on **{main}**."
+    if unchecked:
+        summary += f" {unchecked} sentences could not be checked this time."
+    parts.append(summary)
+    if corrections:
+        parts.append("#### Corrected text")
+        parts.append(" ".join(corrected_text))
+    return "\n\n".join(parts)
@@ -0,0 +1,286 @@
+"""Gemini client layer: rate limiting, concurrency cap, retries and typed errors.
+
+Every model call in the app goes through GeminiClient so that, under load, a
+burst of clicks is smoothed by a process-wide token bucket and in-flight cap
+instead of turning into a cascade of quota errors, and transient failures
+(429 / 5xx) are retried with exponential backoff and jitter.
+"""
+import hashlib
+import random
+import threading
+import time
+from collections import OrderedDict
+
+
+class GeminiError(Exception):
+    """A model call that failed for good (after any retries)"""
+    retryable = False
+    # Number of attempts made before giving up
+    attempts = 1
+
+
+class RateLimitError(GeminiError):
+    """Quota exhausted (HTTP 429) or the local rate limiter timed out"""
+    retryable = True
+
+
+class ServerError(GeminiError):
+    """Gemini returned a 5xx or the connection failed"""
+    retryable = True
+
+
+class RequestError(GeminiError):
+    """The request itself was rejected (bad key, bad argument, ...)"""
+
+
+class BlockedResponseError(GeminiError):
+    """The response was empty or blocked by safety filters"""
+
+
+def classify_error(exc):
+    """Map an exception raised by google-generativeai to a GeminiError"""
+    if isinstance(exc, GeminiError):
+        return exc
+    code = getattr(exc, "code", None)
+    if code == 429:
+        return RateLimitError(str(exc))
+    if isinstance(code, int) and code >= 500:
+        return ServerError(str(exc))
+    if isinstance(code, int):
+        return RequestError(str(exc))
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return ServerError(str(exc))
+    if isinstance(exc, ValueError):
+        # response.text raises ValueError when there are no usable candidates
+        return BlockedResponseError(str(exc))
+    return GeminiError(f"{type(exc).__name__}: {exc}")
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at rate tokens per second"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        """Take one token, waiting for a refill. Returns False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+class Completion:
+    """Text of a finished call plus its usage metadata and attempt count"""
+
+    def __init__(self, text="", usage=None, attempts=1):
+        self.text = text
+        self.usage = usage
+        self.attempts = attempts
+
+
+class StreamingCompletion(Completion):
+    """Iterate to receive text chunks; text/usage are complete once exhausted.
+
+    The in-flight slot is released once, by whichever comes first: the end
+    of iteration, close() (also on leaving a with block), or garbage
+    collection, so a stream abandoned before or during iteration can't leak it.
+    """
+
+    def __init__(self, chunks, attempts, release):
+        super().__init__(attempts=attempts)
+        self._chunks = chunks
+        self._release = release
+        self._released = False
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+    def close(self):
+        """Stop the stream and release its in-flight slot"""
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        try:
+            close = getattr(self._chunks, "close", None)
+            if close is not None:
+                close()
+        finally:
+            self._release()
+
+    def __iter__(self):
+        try:
+            for chunk in self._chunks:
+                if getattr(chunk, "usage_metadata", None) is not None:
+                    self.usage = chunk.usage_metadata
+                try:
+                    piece = chunk.text
+                except Exception as e:
+                    raise classify_error(e) from e
+                self.text += piece
+                yield piece
+        except GeminiError:
+            raise
+        except Exception as e:
+            raise classify_error(e) from e
+        finally:
+            self.close()
+
+
+class GeminiClient:
+    """Wraps a GenerativeModel with rate limiting, an in-flight cap and retries"""
+
+    def __init__(self, model, limiter, semaphore, max_retries=4, base_delay=0.5,
+                 max_delay=8.0, acquire_timeout=30.0):
+        self.model = model
+        self.limiter = limiter
+        self.semaphore = semaphore
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.acquire_timeout = acquire_timeout
+
+    def generate(self, prompt, generation_config=None):
+        """Return a Completion for prompt, retrying transient failures"""
+        def attempt():
+            response = self.model.generate_content(prompt, generation_config=generation_config)
+            return response.text, getattr(response, "usage_metadata", None)
+
+        (text, usage), attempts = self._with_retries(attempt)
+        return Completion(text, usage, attempts)
+
+    def stream(self, prompt, generation_config=None):
+        """Return a StreamingCompletion for prompt.
+
+        Only opening the stream (up to the first chunk) is retried; a
+        failure after text has been shown to the user is raised as is. The
+        in-flight slot is held until the stream is exhausted.
+        """
+        def attempt():
+            chunks = iter(self.model.generate_content(prompt, generation_config=generation_config, stream=True))
+            first = next(chunks, None)
+            return first, chunks
+
+        self._acquire()
+        try:
+            (first, chunks), attempts = self._with_retries(attempt, acquire=False)
+        except BaseException:
+            self.semaphore.release()
+            raise
+
+        def all_chunks():
+            if first is not None:
+                yield first
+            yield from chunks
+
+        return StreamingCompletion(all_chunks(), attempts, self.semaphore.release)
+
+    def close(self):
+        """Close the underlying transport, if the model exposes one"""
+        transport = getattr(getattr(self.model, "_client", None), "transport", None)
+        if transport is not None:
+            transport.close()
+
+    def _acquire(self):
+        if not self.limiter.acquire(timeout=self.acquire_timeout):
+            raise RateLimitError("Too many requests right now, please try again in a moment.")
+        if not self.semaphore.acquire(timeout=self.acquire_timeout):
+            raise RateLimitError("The server is busy, please try again in a moment.")
+
+    def _with_retries(self, attempt, acquire=True):
+        for attempt_number in range(1, self.max_retries + 2):
+            if acquire:
+                self._acquire()
+            try:
+                return attempt(), attempt_number
+            except Exception as e:
+                error = classify_error(e)
+                if not error.retryable or attempt_number > self.max_retries:
+                    error.attempts = attempt_number
+                    raise error from e
+            finally:
+                if acquire:
+                    self.semaphore.release()
+            # Full jitter: sleep a random amount up to the exponential cap
+            time.sleep(random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt_number - 1))))
+            if not acquire:
+                # Streams hold their slot across retries but still pay the rate limit
+                if not self.limiter.acquire(timeout=self.acquire_timeout):
+                    raise RateLimitError("Too many requests right now, please try again in a moment.")
+
+
+class ClientRegistry:
+    """Configured GeminiClients keyed by (API key, model name).
+
+    Building a model and its transport is done once per key and model and
+    then reused by every rerun and session using that key. Clients idle for
+    longer than idle_timeout seconds are closed and dropped, and at most
+    max_clients are kept (least recently used are evicted first).
+    """
+
+    def __init__(self, build_model, limiter, semaphore, idle_timeout=1800, max_clients=64):
+        self.build_model = build_model
+        self.limiter = limiter
+        self.semaphore = semaphore
+        self.idle_timeout = idle_timeout
+        self.max_clients = max_clients
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, api_key, model_name):
+        # Only a digest of the key is kept as the registry key
+        key = (hashlib.sha256(api_key.encode("utf-8")).hexdigest(), model_name)
+        now = time.monotonic()
+        evicted = []
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is None:
+                client = GeminiClient(self.build_model(api_key, model_name), self.limiter, self.semaphore)
+                self._clients[key] = [client, now]
+            else:
+                client = entry[0]
+                entry[1] = now
+            self._clients.move_to_end(key)
+
+            for other, (idle_client, last_used) in list(self._clients.items()):
+                if now - last_used > self.idle_timeout or len(self._clients) > self.max_clients:
+                    del self._clients[other]
+                    evicted.append(idle_client)
+                else:
+                    # Ordered by last use, so everything after this is fresher
+                    break
+
+        for idle_client in evicted:
+            try:
+                idle_client.close()
+            except Exception:
+                pass
+        return client
+
+    def __len__(self):
+        with self._lock:
+            return len(self._clients)
@@ -0,0 +1,277 @@
+"""Local answer grading for typed answers and hangman guesses.
+
+Each expected answer is turned into an AnswerKey once, when the quiz is
+built: its Unicode-normalized form, the form with accents folded away,
+the forms without a leading article and a Latin transliteration for
+Cyrillic, kana and Hangul. Grading a response is then a few set lookups
+and, failing those, a bounded (banded) Levenshtein distance against the
+keys, so "cafe" for "café", "la casa" for "casa" or "privet" for "привет"
+are accepted. A response a few edits away is only reported as close: at
+word length a typo can't be told from a different word ("pato" for "gato",
+"pero" for "perro"), so near misses are never counted as correct.
+"""
+import random
+import re
+import unicodedata
+from collections import namedtuple
+
+from vocab_index import fold
+
+# Leading articles that don't change whether a typed answer is right
+ARTICLES = {
+    "Spanish": ("el", "la", "los", "las", "un", "una", "unos", "unas"),
+    "French": ("le", "la", "les", "l'", "un", "une", "des", "du"),
+    "Italian": ("il", "lo", "la", "i", "gli", "le", "l'", "un", "uno", "una", "un'"),
+    "Portuguese": ("o", "a", "os", "as", "um", "uma", "uns", "umas"),
+    "German": ("der", "die", "das", "den", "dem", "des", "ein", "eine", "einen", "einem", "einer"),
+}
+
+CYRILLIC = dict(zip(
+    "абвгдеёжзийклмнопрстуфхцчшщъыьэюя",
+    ["a", "b", "v", "g", "d", "e", "e", "zh", "z", "i", "y", "k", "l", "m", "n", "o", "p", "r", "s", "t", "u",
+     "f", "kh", "ts", "ch", "sh", "shch", "", "y", "", "e", "yu", "ya"],
+))
+
+# Hiragana in gojuon order with their Hepburn romanizations; katakana is mapped onto these
+KANA = dict(zip(
+    "あいうえおかきくけこさしすせそたちつてとなにぬねのはひふへほまみむめもやゆよらりるれろわをん"
+    "がぎぐげござじずぜぞだぢづでどばびぶべぼぱぴぷぺぽ",
+    "a i u e o ka ki ku ke ko sa shi su se so ta chi tsu te to na ni nu ne no ha hi fu he ho "
+    "ma mi mu me mo ya yu yo ra ri ru re ro wa wo n "
+    "ga gi gu ge go za ji zu ze zo da ji zu de do ba bi bu be bo pa pi pu pe po".split(),
+))
+SMALL_KANA = {"ゃ": "ya", "ゅ": "yu", "ょ": "yo", "ぁ": "a", "ぃ": "i", "ぅ": "u", "ぇ": "e", "ぉ": "o"}
+
+# Revised Romanization of Hangul jamo: initials, medials and finals
+HANGUL_INITIALS = "g kk n d tt r m b pp s ss - j jj ch k t p h".split()
+HANGUL_MEDIALS = "a ae ya yae eo e yeo ye o wa wae oe yo u wo we wi yu eu ui i".split()
+HANGUL_FINALS = ["", "k", "k", "k", "n", "n", "n", "t", "l", "k", "m", "l", "l", "l", "p", "l", "m", "p",
+                 "p", "t", "t", "ng", "t", "t", "k", "t", "p", "t"]
+
+# Full keyboards for scripts with a small alphabet, as folded letters
+ALPHABETS = {
+    "LATIN": "abcdefghijklmnopqrstuvwxyz",
+    "CYRILLIC": "абвгдежзиклмнопрстуфхцчшщъыьэюя",
+    "ARABIC": "ابتثجحخدذرزسشصضطظعغفقكلمنهوي",
+    "HIRAGANA": "あいうえおかきくけこさしすせそたちつてとなにぬねのはひふへほまみむめもやゆよらりるれろわをん",
+    "KATAKANA": "アイウエオカキクケコサシスセソタチツテトナニヌネノハヒフヘホマミムメモヤユヨラリルレロワヲン",
+}
+# Unicode ranges to draw extra keys from for scripts with too many characters to show them all
+SCRIPT_RANGES = {
+    "HANGUL": (0xAC00, 0xD7A3),
+    "CJK": (0x4E00, 0x9FFF),
+}
+
+# Share of words below which a sentence answer is taken to be unrelated to an accepted one
+UNRELATED_OVERLAP = 0.2
+
+Grade = namedtuple("Grade", "correct exact distance expected")
+
+AnswerKey = namedtuple("AnswerKey", "answer exact keys tolerance")
+
+
+def normalize(text):
+    """NFC, case-folded, with surrounding punctuation and extra whitespace removed"""
+    text = unicodedata.normalize("NFC", text).casefold()
+    text = re.sub(r"[\s.,;:!?¡¿\"“”«»()]+", " ", text)
+    return " ".join(text.split())
+
+
+def strip_article(text, language):
+    for article in ARTICLES.get(language, ()):
+        if article.endswith("'") and text.startswith(article):
+            return text[len(article):].lstrip()
+        if text.startswith(article + " "):
+            return text[len(article) + 1:]
+    return text
+
+
+def transliterate(text):
+    """Latin transliteration of Cyrillic, kana and Hangul; other characters are kept"""
+    out = []
+    for char in text:
+        code = ord(char)
+        if 0x30A1 <= code <= 0x30F6:
+            # Katakana to hiragana
+            char = chr(code - 0x60)
+            code -= 0x60
+        if char in CYRILLIC:
+            out.append(CYRILLIC[char])
+        elif char in KANA:
+            out.append(KANA[char])
+        elif char in SMALL_KANA:
+            small = SMALL_KANA[char]
+            if out and len(out[-1]) > 1 and out[-1].endswith("i") and small.startswith("y"):
+                # きゃ -> kya, しゃ -> sha: the small kana replaces the vowel
+                base = out.pop()[:-1]
+                out.append(base + (small[1:] if base.endswith(("sh", "ch", "j")) else small))
+            else:
+                out.append(small)
+        elif char == "っ":
+            # Doubles the next consonant
+            out.append("\0")
+        elif 0xAC00 <= code <= 0xD7A3:
+            index = code - 0xAC00
+            initial = HANGUL_INITIALS[index // 588]
+            out.append(("" if initial == "-" else initial) + HANGUL_MEDIALS[index % 588 // 28] + HANGUL_FINALS[index % 28])
+        else:
+            out.append(char)
+    for index, piece in enumerate(out):
+        if piece == "\0":
+            following = out[index + 1] if index + 1 < len(out) else ""
+            out[index] = following[:1] if following[:1].isalpha() else ""
+    return "".join(out)
+
+
+def forms(text, language):
+    """Every accepted spelling of text: normalized, without article, folded and transliterated"""
+    normalized = normalize(text)
+    results = {normalized, strip_article(normalized, language)}
+    for form in list(results):
+        results.add(fold(form))
+        results.add(fold(transliterate(form)))
+    results.discard("")
+    return results
+
+
+def answer_key(answer, language, tolerance=None):
+    """Precompute the keys a typed response to answer is graded against"""
+    keys = frozenset(forms(answer, language))
+    if tolerance is None:
+        shortest = min((len(key) for key in keys), default=0)
+        # Short words must be spelled right, longer ones may carry a typo or two
+        tolerance = 0 if shortest <= 3 else 1 if shortest <= 7 else 2
+    return AnswerKey(answer, normalize(answer), keys, tolerance)
+
+
+def sentence_key(answer, language):
+    """AnswerKey for a whole sentence, allowing about one typo per ten characters"""
+    return answer_key(answer, language, tolerance=max(2, len(answer) // 10))
+
+
+def grade(key, response, language):
+    """Grade a typed response against a precomputed AnswerKey.
+
+    A response matching the answer as written is exact; one that matches
+    after folding accents, dropping an article or transliterating is
+    correct but not exact. One within key.tolerance edits of a key is a
+    near miss: not correct, with its distance set.
+    """
+    if not response.strip():
+        return Grade(False, False, None, key.answer)
+    candidates = forms(response, language)
+    if normalize(response) == key.exact:
+        return Grade(True, True, 0, key.answer)
+    if candidates & key.keys:
+        return Grade(True, False, 0, key.answer)
+    best = key.tolerance + 1
+    for candidate in candidates:
+        for expected in key.keys:
+            best = min(best, bounded_levenshtein(candidate, expected, key.tolerance))
+    if best <= key.tolerance:
+        return Grade(False, False, best, key.answer)
+    return Grade(False, False, None, key.answer)
+
+
+def grade_any(keys, response, language, sentence=False):
+    """Best Grade of response against several accepted answers.
+
+    Returns None when the local grader can't decide: a sentence that is a
+    near miss of an accepted translation may only carry a typo, and one
+    that isn't clearly unrelated to all of them may still be a valid
+    translation worded differently.
+    """
+    best = None
+    closest = None
+    for key in keys:
+        result = grade(key, response, language)
+        if result.exact:
+            return result
+        if result.correct:
+            best = result
+        elif result.distance is not None and (closest is None or result.distance < closest.distance):
+            closest = result
+    if best is not None:
+        return best
+    if closest is not None:
+        return None if sentence else closest
+    wrong = Grade(False, False, None, keys[0].answer)
+    if not sentence or not response.strip():
+        return wrong
+    if max(token_overlap(response, key.answer) for key in keys) < UNRELATED_OVERLAP:
+        return wrong
+    return None
+
+
+def token_overlap(a, b):
+    """Jaccard similarity of the folded words of a and b"""
+    words_a = set(fold(normalize(a)).split())
+    words_b = set(fold(normalize(b)).split())
+    if not words_a or not words_b:
+        return 0.0
+    return len(words_a & words_b) / len(words_a | words_b)
+
+
+def bounded_levenshtein(a, b, limit):
+    """Edit distance between a and b, or limit + 1 if it is larger than limit.
+
+    Only the band of cells within limit of the diagonal is computed, so the
+    cost is O(limit * len) rather than O(len(a) * len(b)).
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if len(a) > len(b):
+        a, b = b, a
+    over = limit + 1
+    previous = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [over] * (len(b) + 1)
+        current[0] = i if i <= limit else over
+        row_best = current[0]
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            value = min(previous[j - 1] + (a[i - 1] != b[j - 1]), previous[j] + 1, current[j - 1] + 1)
+            current[j] = value if value < over else over
+            if value < row_best:
+                row_best = value
+        if row_best > limit:
+            return over
+        previous = current
+    return previous[len(b)]
+
+
+def letter_key(char):
+    """The key a hangman guess is matched on: lower case without accents or voicing marks"""
+    if not char:
+        # Nothing typed in the guess box yet
+        return char
+    if 0xAC00 <= ord(char) <= 0xD7A3:
+        # NFKD would split a Hangul syllable into jamo
+        return char
+    decomposed = unicodedata.normalize("NFKD", char)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()[:1] or char
+
+
+def script_of(word):
+    for char in word:
+        if char.isalpha():
+            name = unicodedata.name(char, "")
+            return name.split(" ", 1)[0]
+    return "LATIN"
+
+
+def keyboard(word, extra=12, rng=random):
+    """Hangman keys for word: the full alphabet of its script where that is small,
+    otherwise the word's own characters plus extra decoys from the same script"""
+    letters = {letter_key(char) for char in word if char.isalpha()}
+    script = script_of(word)
+    if script in ALPHABETS:
+        keys = set(ALPHABETS[script]) | letters
+        return sorted(keys)
+    keys = set(letters)
+    low, high = SCRIPT_RANGES.get(script, (None, None))
+    if low is not None:
+        while len(keys) < len(letters) + extra:
+            keys.add(chr(rng.randint(low, high)))
+    keys = list(keys)
+    rng.shuffle(keys)
+    return keys
@@ -0,0 +1,279 @@
+"""Durable learner data in SQLite.
+
+Saved vocabulary lists, flashcard decks, quiz history, game results and
+spaced-repetition cards are kept in a WAL-mode SQLite database instead of
+st.session_state, so they survive reconnects and restarts and don't grow
+server memory per session. Writes are queued and committed in batches by a
+single writer thread. Reads borrow a connection from a small shared pool
+(Streamlit runs every rerun on a new thread, so per-thread connections
+would be reopened each time) and first wait for the queued writes of the
+learner they read, so a session always sees its own writes without
+waiting on anyone else's.
+"""
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS saved_vocab (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    language TEXT NOT NULL,
+    level TEXT NOT NULL,
+    focus TEXT NOT NULL,
+    created REAL NOT NULL,
+    text TEXT NOT NULL,
+    entries TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS saved_vocab_lookup ON saved_vocab (user, language, level, focus, created);
+CREATE INDEX IF NOT EXISTS saved_vocab_recent ON saved_vocab (user, created);
+
+CREATE TABLE IF NOT EXISTS flashcard_decks (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    language TEXT NOT NULL,
+    level TEXT NOT NULL,
+    focus TEXT NOT NULL,
+    created REAL NOT NULL,
+    entries TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS flashcard_decks_lookup ON flashcard_decks (user, language, level, focus, created);
+
+CREATE TABLE IF NOT EXISTS quiz_history (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    language TEXT NOT NULL,
+    level TEXT NOT NULL,
+    focus TEXT NOT NULL,
+    created REAL NOT NULL,
+    word TEXT NOT NULL,
+    correct INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS quiz_history_lookup ON quiz_history (user, language, level, focus, created);
+
+CREATE TABLE IF NOT EXISTS game_results (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    language TEXT NOT NULL,
+    level TEXT NOT NULL,
+    focus TEXT NOT NULL,
+    created REAL NOT NULL,
+    game TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    detail TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS game_results_lookup ON game_results (user, language, level, focus, created);
+
+CREATE TABLE IF NOT EXISTS review_cards (
+    user TEXT NOT NULL,
+    card_id TEXT NOT NULL,
+    word TEXT NOT NULL,
+    meaning TEXT NOT NULL,
+    ease REAL NOT NULL,
+    interval REAL NOT NULL,
+    repetitions INTEGER NOT NULL,
+    due REAL NOT NULL,
+    lapses INTEGER NOT NULL,
+    reviews INTEGER NOT NULL,
+    PRIMARY KEY (user, card_id)
+);
+"""
+
+INSERT_SAVED_VOCAB = """INSERT INTO saved_vocab (user, language, level, focus, created, text, entries)
+    VALUES (?, ?, ?, ?, ?, ?, ?)"""
+INSERT_DECK = """INSERT INTO flashcard_decks (user, language, level, focus, created, entries)
+    VALUES (?, ?, ?, ?, ?, ?)"""
+INSERT_QUIZ_ANSWER = """INSERT INTO quiz_history (user, language, level, focus, created, word, correct)
+    VALUES (?, ?, ?, ?, ?, ?, ?)"""
+INSERT_GAME_RESULT = """INSERT INTO game_results (user, language, level, focus, created, game, score, total, detail)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+UPSERT_CARD = """INSERT OR REPLACE INTO review_cards
+    (user, card_id, word, meaning, ease, interval, repetitions, due, lapses, reviews)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+logger = logging.getLogger(__name__)
+
+
+class LearnerStore:
+    def __init__(self, path, batch_size=200, batch_window=0.05, max_readers=4):
+        self.path = path
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.max_readers = max_readers
+        self._queue = queue.Queue()
+        # Idle read connections; sqlite3 keeps each one's prepared statements cached
+        self._readers = queue.LifoQueue()
+        self._reader_count = 0
+        # Sequence numbers of queued writes: the last one per learner, and the last one committed or failed
+        self._lock = threading.Condition()
+        self._submitted = 0
+        self._done = 0
+        self._last_write = {}
+        self._failures = Counter()
+
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        conn.commit()
+        self._writer = threading.Thread(target=self._write_loop, args=(conn,), name="learner-store", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _reader(self, user):
+        """Borrow a pooled read connection once user's queued writes are committed"""
+        with self._lock:
+            pending = self._last_write.get(user, 0)
+            self._lock.wait_for(lambda: self._done >= pending)
+            if self._last_write.get(user) == pending:
+                del self._last_write[user]
+            create = self._readers.empty() and self._reader_count < self.max_readers
+            if create:
+                self._reader_count += 1
+        conn = self._connect() if create else self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    def _write_loop(self, conn):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                with conn:
+                    for _, sql, params in batch:
+                        conn.execute(sql, params)
+            except sqlite3.Error:
+                # Retry one write per transaction so a bad row only loses itself
+                for _, sql, params in batch:
+                    try:
+                        with conn:
+                            conn.execute(sql, params)
+                    except sqlite3.Error:
+                        logger.exception("Learner store write failed for %s", params[0])
+                        with self._lock:
+                            self._failures[params[0]] += 1
+            finally:
+                with self._lock:
+                    self._done = batch[-1][0]
+                    self._lock.notify_all()
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, sql, params):
+        # Every write's first parameter is the learner it belongs to
+        with self._lock:
+            self._submitted += 1
+            self._last_write[params[0]] = self._submitted
+            # Put under the lock so the queue stays in sequence order
+            self._queue.put((self._submitted, sql, params))
+
+    def flush(self):
+        """Block until every queued write is committed"""
+        self._queue.join()
+
+    def take_failures(self, user):
+        """Number of user's writes that failed since the last call"""
+        with self._lock:
+            return self._failures.pop(user, 0)
+
+    # Writes
+
+    def save_vocab(self, user, language, level, focus, text, entries):
+        self._write(INSERT_SAVED_VOCAB, (user, language, level, focus, time.time(), text, json.dumps(entries)))
+
+    def save_deck(self, user, language, level, focus, entries):
+        self._write(INSERT_DECK, (user, language, level, focus, time.time(), json.dumps(entries)))
+
+    def record_quiz_answer(self, user, language, level, focus, word, correct):
+        self._write(INSERT_QUIZ_ANSWER, (user, language, level, focus, time.time(), word, int(correct)))
+
+    def record_game(self, user, language, level, focus, game, score, total, detail=None):
+        self._write(INSERT_GAME_RESULT, (user, language, level, focus, time.time(), game, score, total,
+                                         json.dumps(detail or {})))
+
+    def save_card(self, user, card):
+        self._write(UPSERT_CARD, (user, card.card_id, card.word, card.meaning, card.ease, card.interval,
+                                  card.repetitions, card.due, card.lapses, card.reviews))
+
+    # Reads
+
+    def _fetchone(self, user, sql, params):
+        with self._reader(user) as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def _fetchall(self, user, sql, params):
+        with self._reader(user) as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def count_saved_vocab(self, user):
+        (count,) = self._fetchone(user, "SELECT COUNT(*) FROM saved_vocab WHERE user = ?", (user,))
+        return count
+
+    def saved_vocab_page(self, user, offset, limit):
+        """Headers (no text) of saved lists, newest first"""
+        rows = self._fetchall(
+            user,
+            """SELECT id, created, language, level, focus FROM saved_vocab
+               WHERE user = ? ORDER BY created DESC LIMIT ? OFFSET ?""",
+            (user, limit, offset),
+        )
+        return [dict(zip(("id", "created", "language", "level", "focus"), row)) for row in rows]
+
+    def get_saved_vocab(self, user, vocab_id):
+        row = self._fetchone(
+            user,
+            "SELECT language, level, focus, created, text, entries FROM saved_vocab WHERE user = ? AND id = ?",
+            (user, vocab_id),
+        )
+        if row is None:
+            return None
+        language, level, focus, created, text, entries = row
+        return {"language": language, "level": level, "focus": focus, "created": created,
+                "text": text, "entries": json.loads(entries)}
+
+    def latest_deck(self, user, language, level, focus):
+        row = self._fetchone(
+            user,
+            """SELECT entries FROM flashcard_decks WHERE user = ? AND language = ? AND level = ? AND focus = ?
+               ORDER BY created DESC LIMIT 1""",
+            (user, language, level, focus),
+        )
+        return json.loads(row[0]) if row else []
+
+    def quiz_totals(self, user, language, level, focus):
+        """(correct, answered) over the learner's whole quiz history for these settings"""
+        correct, total = self._fetchone(
+            user,
+            """SELECT COALESCE(SUM(correct), 0), COUNT(*) FROM quiz_history
+               WHERE user = ? AND language = ? AND level = ? AND focus = ?""",
+            (user, language, level, focus),
+        )
+        return correct, total
+
+    def load_cards(self, user):
+        return self._fetchall(
+            user,
+            """SELECT card_id, word, meaning, ease, interval, repetitions, due, lapses, reviews
+               FROM review_cards WHERE user = ?""",
+            (user,),
+        )
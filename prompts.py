@@ -0,0 +1,35 @@
+"""Settings options and prompts shared by the app and the content pack builder"""
+
+LANGUAGES = ["Spanish", "French", "German", "Japanese", "Mandarin", "Italian", "Portuguese", "Russian", "Korean", "Arabic"]
+SKILL_LEVELS = ["Beginner", "Intermediate", "Advanced"]
+LEARNING_FOCUSES = ["General", "Travel", "Business", "Academic", "Medical", "Technology"]
+
+
+def sentences_prompt(language, level, focus):
+    return f"""Give 5 {level.lower()} level example sentences in {language} with English translations.
+        These should be useful for someone focusing on {focus.lower()} topics.
+        Format each as:
+        - [Target Language Sentence]
+        - [English Translation]
+        (add a blank line between different examples)"""
+
+
+def phonetic_chart_prompt(language):
+    return f"""Create a comprehensive phonetic chart for {language} showing all the main sounds.
+                For each sound, provide:
+                1. The IPA symbol
+                2. Example words in {language}
+                3. Closest English approximation if any
+
+                Format this as a well-organized markdown table."""
+
+
+def minimal_pairs_prompt(language, level):
+    return f"""Create 5 sets of minimal pairs in {language} that {level.lower()} learners often struggle with.
+                For each pair:
+                1. Show the two words
+                2. Provide their meanings
+                3. Explain the exact sound difference
+                4. Give a tip on distinguishing them
+
+                Format this information clearly in markdown."""
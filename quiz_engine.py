@@ -0,0 +1,95 @@
+"""Quiz generation over vocabulary index arrays.
+
+Questions pick vocabulary entries by index from shuffled permutations (no
+replacement until the deck is used up) and draw distractors by index from
+the table of distinct meanings, so building a quiz is linear in the number
+of questions and large question banks for export take milliseconds.
+"""
+import csv
+import io
+import json
+import random
+
+
+def generate_quiz(vocabulary, num_questions=20, language="the target language", rng=random):
+    """Generate num_questions questions from vocabulary entries.
+
+    Each question records its vocabulary entry in "word"/"meaning" and its
+    index in "item_index".
+    When the deck is shorter than num_questions, it is cycled through again
+    in a new random order.
+    """
+    size = len(vocabulary)
+    if size == 0 or num_questions <= 0:
+        return []
+
+    # Distinct meanings, so distractors never duplicate the correct answer
+    meanings = list(dict.fromkeys(item["meaning"] for item in vocabulary))
+    meaning_index = {meaning: i for i, meaning in enumerate(meanings)}
+
+    order = []
+    while len(order) < num_questions:
+        order.extend(rng.sample(range(size), size))
+    del order[num_questions:]
+
+    questions = []
+    for item_index in order:
+        item = vocabulary[item_index]
+        if rng.random() < 0.5:
+            correct = meaning_index[item["meaning"]]
+            picks = rng.sample(range(len(meanings)), min(4, len(meanings)))
+            options = [meanings[i] for i in picks if i != correct][:3]
+            options.append(item["meaning"])
+            # Small decks can't supply three real distractors
+            padding = 0
+            while len(options) < 4:
+                padding += 1
+                fake_meaning = f"{meanings[rng.randrange(len(meanings))]} (modified)"
+                if padding > 1:
+                    fake_meaning += f" {padding}"
+                if fake_meaning not in options:
+                    options.append(fake_meaning)
+            rng.shuffle(options)
+
+            questions.append({
+                "type": "multiple_choice",
+                "question": rng.choice([
+                    f"What is the meaning of '{item['word']}'?",
+                    f"Which translation is correct for '{item['word']}'?",
+                ]),
+                "options": options,
+                "correct_answer": item["meaning"],
+                "word": item["word"],
+                "meaning": item["meaning"],
+                "item_index": item_index,
+            })
+        else:
+            questions.append({
+                "type": "fill_blank",
+                "question": rng.choice([
+                    f"What is the {language} word for '{item['meaning']}'?",
+                    f"Translate '{item['meaning']}' to {language}:",
+                ]),
+                "correct_answer": item["word"],
+                "word": item["word"],
+                "meaning": item["meaning"],
+                "item_index": item_index,
+            })
+
+    return questions
+
+
+def quiz_to_json(questions):
+    return json.dumps(questions, ensure_ascii=False, indent=2)
+
+
+def quiz_to_csv(questions):
+    """One row per question, multiple choice options in separate columns"""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(["type", "question", "option_1", "option_2", "option_3", "option_4", "correct_answer"])
+    for question in questions:
+        options = question.get("options", [])
+        writer.writerow([question["type"], question["question"], *options, *[""] * (4 - len(options)),
+                         question["correct_answer"]])
+    return output.getvalue()
@@ -0,0 +1,160 @@
+"""Two-tier cache for Gemini responses.
+
+Responses are addressed by a hash of (model name, normalized prompt,
+generation config). A small in-process LRU sits in front of a SQLite file so
+repeated prompts are served without a model call, across sessions and across
+server restarts.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Time-to-live (seconds) per prompt family. Content that only depends on the
+# sidebar settings can live for a long time; anything built from free text the
+# learner typed is unlikely to repeat, so it expires quickly.
+FAMILY_TTLS = {
+    "vocab": 7 * 24 * 3600,
+    "sentences": 7 * 24 * 3600,
+    "pronunciation_guide": 30 * 24 * 3600,
+    "phonetic_chart": 30 * 24 * 3600,
+    "minimal_pairs": 30 * 24 * 3600,
+    "audio": 7 * 24 * 3600,
+    "diagrams": 30 * 24 * 3600,
+    "ipa": 30 * 24 * 3600,
+    "writing_topics": 24 * 3600,
+    "translation": 24 * 3600,
+    "fill_blanks": 24 * 3600,
+    "creative": 24 * 3600,
+    "exercise_batch": 24 * 3600,
+    "answer_check": 7 * 24 * 3600,
+    "stress": 3600,
+    "syllables": 24 * 3600,
+    "feedback": 3600,
+    # Keyed by the sentence itself, so a learner's revisions can reuse it
+    "sentence_feedback": 7 * 24 * 3600,
+    # Built from one learner's conversation, never asked for twice
+    "chat_summary": 3600,
+}
+DEFAULT_TTL = 24 * 3600
+
+
+def normalize_prompt(prompt):
+    """Collapse whitespace so re-indented prompts hash the same"""
+    return " ".join(prompt.split())
+
+
+def make_key(model_name, prompt, generation_config=None, variant=0):
+    """Content address for a prompt sent to a given model"""
+    payload = json.dumps(
+        {
+            "model": model_name,
+            "prompt": normalize_prompt(prompt),
+            "config": generation_config or {},
+            "variant": variant,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """In-memory LRU tier backed by a size-bounded SQLite tier"""
+
+    def __init__(self, path, memory_entries=512, disk_entries=20000, family_ttls=None):
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self.family_ttls = dict(FAMILY_TTLS if family_ttls is None else family_ttls)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                family TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+        self._db.commit()
+
+    def ttl_for(self, family):
+        return self.family_ttls.get(family, DEFAULT_TTL)
+
+    def get(self, key):
+        """Return the cached text for key, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires > now:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+
+            row = self._db.execute(
+                "SELECT value, expires FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                value, expires = row
+                if expires > now:
+                    self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                    self._db.commit()
+                    self._remember(key, value, expires)
+                    self.stats["disk_hits"] += 1
+                    return value
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+
+            self.stats["misses"] += 1
+            return None
+
+    def set(self, key, value, family="general"):
+        """Store value under key with the TTL of its prompt family"""
+        now = time.time()
+        expires = now + self.ttl_for(family)
+        with self._lock:
+            self._remember(key, value, expires)
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, family, value, expires, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, family, value, expires, now),
+            )
+            self._evict_disk(now)
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+    def _remember(self, key, value, expires):
+        self._memory[key] = (value, expires)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _evict_disk(self, now):
+        self._db.execute("DELETE FROM responses WHERE expires <= ?", (now,))
+        (count,) = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()
+        overflow = count - self.disk_entries
+        if overflow > 0:
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_access LIMIT ?)",
+                (overflow,),
+            )
+            self.stats["evictions"] += overflow
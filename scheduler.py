@@ -0,0 +1,112 @@
+"""SM-2 spaced-repetition scheduler with a heap-backed review index.
+
+Every graded answer updates the card's ease, interval and due time. Due
+times live in a binary heap, so finding the next card to review is
+O(log n) amortized even for decks with tens of thousands of cards.
+Rescheduled cards leave stale heap entries behind; they are skipped lazily
+when they reach the top and the heap is rebuilt if they pile up.
+"""
+import heapq
+import time
+
+DAY = 24 * 3600
+# Failed cards come back after a short relearning step instead of a full day
+RELEARN_DELAY = 10 * 60
+MIN_EASE = 1.3
+
+
+class Card:
+    __slots__ = ("card_id", "word", "meaning", "ease", "interval", "repetitions",
+                 "due", "lapses", "reviews", "version")
+
+    def __init__(self, card_id, word, meaning, due):
+        self.card_id = card_id
+        self.word = word
+        self.meaning = meaning
+        self.ease = 2.5
+        self.interval = 0.0
+        self.repetitions = 0
+        self.due = due
+        self.lapses = 0
+        self.reviews = 0
+        self.version = 0
+
+
+class Scheduler:
+    def __init__(self):
+        self.cards = {}
+        self._heap = []
+
+    def __len__(self):
+        return len(self.cards)
+
+    def add(self, card_id, word, meaning, now=None):
+        """Add a new card, due immediately. Existing cards are left alone"""
+        card = self.cards.get(card_id)
+        if card is None:
+            card = Card(card_id, word, meaning, time.time() if now is None else now)
+            self.cards[card_id] = card
+            self._push(card)
+        return card
+
+    def restore(self, card_id, word, meaning, ease, interval, repetitions, due, lapses, reviews):
+        """Load a card with state saved earlier"""
+        card = Card(card_id, word, meaning, due)
+        card.ease = ease
+        card.interval = interval
+        card.repetitions = repetitions
+        card.lapses = lapses
+        card.reviews = reviews
+        self.cards[card_id] = card
+        self._push(card)
+        return card
+
+    def review(self, card_id, quality, now=None):
+        """Grade a review of card_id with SM-2 quality 0 (blackout) to 5 (perfect)"""
+        now = time.time() if now is None else now
+        card = self.cards[card_id]
+        card.reviews += 1
+        if quality < 3:
+            card.repetitions = 0
+            card.lapses += 1
+            card.interval = 0.0
+            card.due = now + RELEARN_DELAY
+        else:
+            card.repetitions += 1
+            if card.repetitions == 1:
+                card.interval = 1.0
+            elif card.repetitions == 2:
+                card.interval = 6.0
+            else:
+                card.interval = round(card.interval * card.ease, 2)
+            card.due = now + card.interval * DAY
+        card.ease = max(MIN_EASE, card.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+        card.version += 1
+        self._push(card)
+        return card
+
+    def peek(self):
+        """Card with the earliest due time, or None for an empty deck"""
+        heap = self._heap
+        while heap:
+            due, version, card_id = heap[0]
+            card = self.cards.get(card_id)
+            if card is not None and card.version == version:
+                return card
+            heapq.heappop(heap)
+        return None
+
+    def next_due(self, now=None):
+        """Earliest card that is due by now, or None"""
+        card = self.peek()
+        now = time.time() if now is None else now
+        if card is not None and card.due <= now:
+            return card
+        return None
+
+    def _push(self, card):
+        heapq.heappush(self._heap, (card.due, card.version, card.card_id))
+        if len(self._heap) > 2 * len(self.cards) + 64:
+            # Drop stale entries left behind by rescheduled cards
+            self._heap = [(c.due, c.version, c.card_id) for c in self.cards.values()]
+            heapq.heapify(self._heap)
@@ -0,0 +1,142 @@
+"""Request coalescing for identical concurrent calls.
+
+While a call for a key is in flight, other callers with the same key wait on
+the same future instead of issuing a duplicate request, and receive the
+shared result or exception. Streamed calls are shared the same way through
+a StreamBuffer that every caller reads, and renders, on its own.
+"""
+import threading
+from concurrent.futures import Future
+
+# Result handed to waiters when the leader was interrupted rather than failed
+_ABANDONED = object()
+
+
+class StreamBuffer:
+    """Chunks of one streamed result, readable by any number of callers while it is produced"""
+
+    def __init__(self):
+        self._chunks = []
+        self._done = False
+        self._error = None
+        self._cond = threading.Condition()
+
+    def append(self, chunk):
+        with self._cond:
+            self._chunks.append(chunk)
+            self._cond.notify_all()
+
+    def finish(self, error=None):
+        with self._cond:
+            self._done = True
+            self._error = error
+            self._cond.notify_all()
+
+    def __iter__(self):
+        """Yield every chunk from the first, waiting for new ones until the stream
+        finishes; re-raises the producer's exception at the end"""
+        index = 0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: len(self._chunks) > index or self._done)
+                new = self._chunks[index:]
+                done = self._done
+                error = self._error
+            index += len(new)
+            yield from new
+            if done and index == len(self._chunks):
+                if error is not None:
+                    raise error
+                return
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._streams = {}
+        self.stats = {"leaders": 0, "coalesced": 0}
+
+    def do(self, key, fn):
+        """Run fn once per key at a time.
+
+        Returns (result, leader) where leader is True for the caller that
+        actually ran fn. Waiters re-raise the leader's Exception. If the
+        leader is interrupted by a BaseException (such as Streamlit stopping
+        or rerunning its script) that stays with the leader, and the waiters
+        start over, one of them as the new leader.
+        """
+        while True:
+            with self._lock:
+                future = self._calls.get(key)
+                leader = future is None
+                if leader:
+                    future = Future()
+                    self._calls[key] = future
+                    self.stats["leaders"] += 1
+                else:
+                    self.stats["coalesced"] += 1
+
+            if not leader:
+                result = future.result()
+                if result is _ABANDONED:
+                    continue
+                return result, False
+
+            try:
+                result = fn()
+            except Exception as e:
+                self._release(key)
+                future.set_exception(e)
+                raise
+            except BaseException:
+                self._release(key)
+                future.set_result(_ABANDONED)
+                raise
+            self._release(key)
+            future.set_result(result)
+            return result, True
+
+    def stream(self, key, produce, executor):
+        """Share one streamed call per key.
+
+        The leader submits produce(append) to executor, which calls append
+        with each chunk as it arrives; nothing is rendered there. Returns
+        (buffer, leader): every caller iterates the StreamBuffer itself.
+        """
+        with self._lock:
+            buffer = self._streams.get(key)
+            leader = buffer is None
+            if leader:
+                buffer = self._streams[key] = StreamBuffer()
+                self.stats["leaders"] += 1
+            else:
+                self.stats["coalesced"] += 1
+        if leader:
+            try:
+                executor.submit(self._produce, key, produce, buffer)
+            except BaseException as e:
+                with self._lock:
+                    del self._streams[key]
+                buffer.finish(e if isinstance(e, Exception) else RuntimeError("stream was not started"))
+                raise
+        return buffer, leader
+
+    def _produce(self, key, produce, buffer):
+        error = None
+        try:
+            produce(buffer.append)
+        except Exception as e:
+            error = e
+        finally:
+            with self._lock:
+                del self._streams[key]
+            buffer.finish(error)
+
+    def _release(self, key):
+        with self._lock:
+            del self._calls[key]
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls) + len(self._streams)
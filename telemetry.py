@@ -0,0 +1,187 @@
+"""Per-family instrumentation of Gemini calls.
+
+Every call the app makes is tagged with its prompt family (vocab, sentences,
+feedback, ...). For each family this records cache hits and misses,
+coalesced waits, a latency histogram, prompt/response token counts, retries
+and errors, so it is possible to tell which tabs burn the quota and the
+latency budget. Aggregates export as Prometheus text; the most recent calls
+export as JSON lines.
+"""
+import json
+import threading
+import time
+from collections import deque
+
+# Histogram bucket upper bounds in seconds (Prometheus "le" labels)
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0)
+
+# USD per million (prompt, response) tokens
+MODEL_PRICES = {
+    "gemini-2.0-flash": (0.10, 0.40),
+}
+
+
+class FamilyStats:
+    __slots__ = ("cache_hits", "cache_misses", "coalesced", "calls", "errors", "retries",
+                 "prompt_tokens", "response_tokens", "latency_sum", "buckets", "error_types")
+
+    def __init__(self):
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.coalesced = 0
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.prompt_tokens = 0
+        self.response_tokens = 0
+        self.latency_sum = 0.0
+        # One count per bucket in LATENCY_BUCKETS plus the +Inf bucket (not cumulative)
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.error_types = {}
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile of call latency, or None"""
+        if not self.calls:
+            return None
+        rank = q * self.calls
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class Telemetry:
+    """Thread-safe counters shared by every session and worker thread"""
+
+    def __init__(self, model_name, recent_calls=1000):
+        self.model_name = model_name
+        self.started = time.time()
+        self._families = {}
+        self._recent = deque(maxlen=recent_calls)
+        self._lock = threading.Lock()
+
+    def _family(self, family):
+        stats = self._families.get(family)
+        if stats is None:
+            stats = self._families[family] = FamilyStats()
+        return stats
+
+    def record_cache(self, family, hit):
+        with self._lock:
+            stats = self._family(family)
+            if hit:
+                stats.cache_hits += 1
+            else:
+                stats.cache_misses += 1
+
+    def record_coalesced(self, family):
+        """A caller that waited for an identical call already in flight"""
+        with self._lock:
+            self._family(family).coalesced += 1
+
+    def record_call(self, family, latency, usage=None, attempts=1, error=None, stream=False):
+        """One model call (including its retries), successful or not"""
+        prompt_tokens = getattr(usage, "prompt_token_count", 0) or 0
+        response_tokens = getattr(usage, "candidates_token_count", 0) or 0
+        with self._lock:
+            stats = self._family(family)
+            stats.calls += 1
+            stats.retries += max(0, attempts - 1)
+            stats.prompt_tokens += prompt_tokens
+            stats.response_tokens += response_tokens
+            stats.latency_sum += latency
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    break
+            else:
+                index = len(LATENCY_BUCKETS)
+            stats.buckets[index] += 1
+            if error is not None:
+                stats.errors += 1
+                name = type(error).__name__
+                stats.error_types[name] = stats.error_types.get(name, 0) + 1
+            self._recent.append({
+                "time": round(time.time(), 3),
+                "family": family,
+                "latency_ms": round(latency * 1000, 1),
+                "prompt_tokens": prompt_tokens,
+                "response_tokens": response_tokens,
+                "attempts": attempts,
+                "stream": stream,
+                "error": None if error is None else type(error).__name__,
+            })
+
+    def cost(self, prompt_tokens, response_tokens):
+        """Estimated USD for the token counts at this model's list price"""
+        prompt_price, response_price = MODEL_PRICES.get(self.model_name, (0.0, 0.0))
+        return (prompt_tokens * prompt_price + response_tokens * response_price) / 1_000_000
+
+    def summary(self):
+        """One row per family, most expensive first, for the admin panel"""
+        with self._lock:
+            rows = []
+            for family, stats in self._families.items():
+                lookups = stats.cache_hits + stats.cache_misses
+                rows.append({
+                    "family": family,
+                    "calls": stats.calls,
+                    "cache hit %": round(100 * stats.cache_hits / lookups, 1) if lookups else None,
+                    "coalesced": stats.coalesced,
+                    "errors": stats.errors,
+                    "retries": stats.retries,
+                    "mean ms": round(1000 * stats.latency_sum / stats.calls) if stats.calls else None,
+                    "p50 ≤ s": stats.quantile(0.5),
+                    "p95 ≤ s": stats.quantile(0.95),
+                    "prompt tokens": stats.prompt_tokens,
+                    "response tokens": stats.response_tokens,
+                    "est. cost $": round(self.cost(stats.prompt_tokens, stats.response_tokens), 4),
+                })
+        rows.sort(key=lambda row: (row["est. cost $"], row["calls"]), reverse=True)
+        return rows
+
+    def prometheus_text(self):
+        """Aggregates in the Prometheus text exposition format"""
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{value}"' for key, value in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}")
+
+        with self._lock:
+            families = sorted(self._families.items())
+            for name, attribute, help_text in (
+                ("gemini_cache_hits_total", "cache_hits", "Responses served from the response cache"),
+                ("gemini_cache_misses_total", "cache_misses", "Response cache lookups that missed"),
+                ("gemini_coalesced_total", "coalesced", "Callers that waited for an identical in-flight call"),
+                ("gemini_calls_total", "calls", "Model calls made, including failed ones"),
+                ("gemini_retries_total", "retries", "Retried attempts of model calls"),
+                ("gemini_prompt_tokens_total", "prompt_tokens", "Prompt tokens sent"),
+                ("gemini_response_tokens_total", "response_tokens", "Response tokens received"),
+            ):
+                metric(name, "counter", help_text,
+                       [({"family": family}, getattr(stats, attribute)) for family, stats in families])
+
+            metric("gemini_errors_total", "counter", "Model calls that failed after retries",
+                   [({"family": family, "error": error}, count)
+                    for family, stats in families for error, count in sorted(stats.error_types.items())])
+
+            lines.append("# HELP gemini_call_latency_seconds Wall time of model calls, including retries")
+            lines.append("# TYPE gemini_call_latency_seconds histogram")
+            for family, stats in families:
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), stats.buckets):
+                    cumulative += count
+                    lines.append(f'gemini_call_latency_seconds_bucket{{family="{family}",le="{bound}"}} {cumulative}')
+                lines.append(f'gemini_call_latency_seconds_sum{{family="{family}"}} {round(stats.latency_sum, 6)}')
+                lines.append(f'gemini_call_latency_seconds_count{{family="{family}"}} {stats.calls}')
+        return "\n".join(lines) + "\n"
+
+    def json_lines(self):
+        """The most recent calls, one JSON object per line"""
+        with self._lock:
+            return "".join(json.dumps(event) + "\n" for event in self._recent)
@@ -0,0 +1,93 @@
+"""End-to-end runs of app.py through AppTest with the fake Gemini backend."""
+import os
+import shutil
+import sys
+from unittest import mock
+
+import pytest
+
+pytest.importorskip("streamlit")
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_DIR, "benchmarks"))
+
+import bench_app  # noqa: E402
+import fake_gemini  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path):
+    # A fresh copy so the response cache and learner database start empty
+    for name in os.listdir(REPO_DIR):
+        if name.endswith(".py"):
+            shutil.copy(os.path.join(REPO_DIR, name), tmp_path)
+    with mock.patch("google.generativeai.GenerativeModel", fake_gemini.FakeGenerativeModel), \
+            mock.patch("google.ai.generativelanguage.GenerativeServiceClient", fake_gemini.FakeServiceClient), \
+            mock.patch("google.ai.generativelanguage.CacheServiceClient", fake_gemini.FakeCacheServiceClient):
+        yield AppTest.from_file(str(tmp_path / "app.py"), default_timeout=30)
+
+
+def test_hangman_board_draws_and_takes_guesses(app):
+    app.run()
+    bench_app.enter_api_key(app)
+    app.run()
+    bench_app.open_section("🎮 Quiz & Games")(app)
+    app.run()
+    bench_app.select("Select Activity", "Hangman")(app)
+    app.run()
+    assert not app.exception
+    assert any(box.label == "Guess a letter:" for box in app.text_input)
+
+    bench_app.guess_letter(app)
+    app.run()
+    assert not app.exception
+    assert app.session_state["hangman"]["guessed_letters"]
+
+
+def test_first_run_renders_preset_section(app):
+    # Nothing was rendered for sections after Pronunciation on the first full run
+    app.session_state["section"] = "📝 Writing Practice"
+    app.run()
+    bench_app.enter_api_key(app)
+    app.run()
+    assert not app.exception
+    assert [header.value for header in app.header] == ["📝 Writing Practice"]
+
+
+def test_checking_a_quiz_answer_twice_reviews_it_once(app):
+    app.run()
+    bench_app.enter_api_key(app)
+    app.run()
+    bench_app.open_section("🎮 Quiz & Games")(app)
+    app.run()
+    bench_app.click("Generate New Quiz")(app)
+    app.run()
+    bench_app.answer_first_question(app)
+    app.run()
+    for _ in range(2):
+        bench_app.click("Check Answer #1")(app)
+        app.run()
+    assert not app.exception
+    assert app.session_state["quiz_total"] == 1
+    word = app.session_state["quiz_questions"][0]["word"]
+    card = next(card for card in app.session_state["scheduler"].cards.values() if card.word == word)
+    assert card.reviews == 1
+
+
+def test_quiz_answer_survives_switching_sections(app):
+    app.run()
+    bench_app.enter_api_key(app)
+    app.run()
+    bench_app.open_section("🎮 Quiz & Games")(app)
+    app.run()
+    bench_app.click("Generate New Quiz")(app)
+    app.run()
+    bench_app.answer_first_question(app)
+    app.run()
+    bench_app.open_section("📝 Writing Practice")(app)
+    app.run()
+    bench_app.open_section("🎮 Quiz & Games")(app)
+    app.run()
+    assert not app.exception
+    assert app.session_state["q0"] == app.session_state["quiz_questions"][0]["correct_answer"]
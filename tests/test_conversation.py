@@ -0,0 +1,21 @@
+from conversation import ChatMemory
+
+
+def chat(turns, length=120):
+    return [{"role": "user" if i % 2 == 0 else "model", "text": "x" * length} for i in range(turns)]
+
+
+def test_under_budget_nothing_is_folded():
+    assert ChatMemory(token_budget=1000).to_fold(chat(4)) == []
+
+
+def test_over_budget_folds_older_turns_and_keeps_recent_ones_from_a_learner_turn():
+    memory = ChatMemory(token_budget=100, keep_recent=3)
+    history = chat(8)
+    folded = memory.to_fold(history)
+    assert len(folded) == 4
+    memory.fold("summary", len(folded))
+    contents = memory.contents(history)
+    assert contents[0]["parts"][0].endswith("summary)")
+    assert contents[2]["role"] == "user"
+    assert len(contents) == 2 + 4
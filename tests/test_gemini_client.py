@@ -0,0 +1,21 @@
+import threading
+from types import SimpleNamespace
+
+from gemini_client import GeminiClient, TokenBucket
+
+
+class StreamingModel:
+    def generate_content(self, prompt, generation_config=None, stream=False):
+        return iter([SimpleNamespace(text="a", usage_metadata=None), SimpleNamespace(text="b", usage_metadata=None)])
+
+
+def test_abandoned_streams_release_their_slot():
+    semaphore = threading.BoundedSemaphore(2)
+    client = GeminiClient(StreamingModel(), TokenBucket(100, 100), semaphore, acquire_timeout=0.1)
+    for _ in range(3):
+        with client.stream("prompt") as completion:
+            # Interrupted after the first chunk, like a rerun while rendering
+            next(iter(completion))
+    completion = client.stream("prompt")
+    completion.close()
+    assert "".join(client.stream("prompt")) == "ab"
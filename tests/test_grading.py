@@ -0,0 +1,41 @@
+from grading import answer_key, grade, grade_any, keyboard, letter_key, sentence_key
+
+
+def test_letter_key_folds_accents_and_case():
+    assert letter_key("É") == "e"
+    assert letter_key("ñ") == "n"
+
+
+def test_letter_key_keeps_hangul_syllables():
+    assert letter_key("한") == "한"
+
+
+def test_letter_key_of_empty_guess_is_empty():
+    # The guess box is empty every time the hangman board is first drawn
+    assert letter_key("") == ""
+
+
+def test_keyboard_covers_word_letters():
+    word = "canción"
+    keys = keyboard(word)
+    assert {letter_key(char) for char in word} <= set(keys)
+
+
+def test_folded_and_article_matches_are_correct():
+    key = answer_key("la casa", "Spanish")
+    assert grade(key, "casa", "Spanish").correct
+    assert grade(answer_key("café", "Spanish"), "cafe", "Spanish").correct
+
+
+def test_near_miss_words_are_close_but_not_correct():
+    # A single edit turns one real word into another
+    for answer, response in [("gato", "pato"), ("perro", "pero")]:
+        result = grade(answer_key(answer, "Spanish"), response, "Spanish")
+        assert not result.correct
+        assert result.distance == 1
+
+
+def test_near_miss_sentence_is_left_undecided():
+    keys = [sentence_key("Me gusta mucho la música clásica", "Spanish")]
+    assert grade_any(keys, "Me gusta mucho la musica clasca", "Spanish", sentence=True) is None
+    assert grade_any(keys, "Me gusta mucho la música clásica", "Spanish", sentence=True).correct
@@ -0,0 +1,30 @@
+import threading
+
+from learner_store import LearnerStore
+
+
+def test_reads_see_the_learners_own_writes(tmp_path):
+    store = LearnerStore(str(tmp_path / "learners.sqlite3"))
+    store.save_vocab("ana", "Spanish", "Beginner", "Travel", "text", [{"word": "casa"}])
+    assert store.count_saved_vocab("ana") == 1
+    assert store.count_saved_vocab("ben") == 0
+
+
+def test_failed_write_only_loses_itself_and_is_reported(tmp_path):
+    store = LearnerStore(str(tmp_path / "learners.sqlite3"))
+    store._write("INSERT INTO missing_table VALUES (?)", ("ana",))
+    store.save_vocab("ana", "Spanish", "Beginner", "Travel", "text", [])
+    assert store.count_saved_vocab("ana") == 1
+    assert store.take_failures("ana") == 1
+    assert store.take_failures("ana") == 0
+
+
+def test_reads_from_many_threads_share_a_few_connections(tmp_path):
+    store = LearnerStore(str(tmp_path / "learners.sqlite3"), max_readers=2)
+    store.save_vocab("ana", "Spanish", "Beginner", "Travel", "text", [])
+    threads = [threading.Thread(target=store.count_saved_vocab, args=("ana",)) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store._reader_count <= 2
@@ -0,0 +1,65 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+class Interrupted(BaseException):
+    """Stands in for Streamlit's RerunException"""
+
+
+def test_waiters_rerun_the_call_when_the_leader_is_interrupted():
+    flight = SingleFlight()
+    results = []
+
+    def interrupted():
+        time.sleep(0.1)
+        raise Interrupted()
+
+    def leader():
+        with pytest.raises(Interrupted):
+            flight.do("key", interrupted)
+
+    first = threading.Thread(target=leader)
+    first.start()
+    time.sleep(0.02)
+    results.append(flight.do("key", lambda: "waiter's own result"))
+    first.join()
+    assert results == [("waiter's own result", True)]
+
+
+def test_waiters_share_the_leaders_exception():
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def failing():
+        started.set()
+        time.sleep(0.05)
+        raise ValueError("boom")
+
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(flight.do, "key", failing)
+        started.wait()
+        waiter = pool.submit(flight.do, "key", lambda: "unused")
+        for future in (leader, waiter):
+            with pytest.raises(ValueError):
+                future.result()
+
+
+def test_streams_are_shared_and_read_by_every_caller():
+    flight = SingleFlight()
+
+    def produce(append):
+        for chunk in ("Hola", " ", "mundo"):
+            time.sleep(0.01)
+            append(chunk)
+
+    with ThreadPoolExecutor(1) as pool:
+        first, leader = flight.stream("key", produce, pool)
+        second, other = flight.stream("key", produce, pool)
+        assert (leader, other) == (True, False)
+        assert "".join(first) == "".join(second) == "Hola mundo"
+    assert flight.in_flight() == 0
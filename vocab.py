@@ -0,0 +1,192 @@
+"""Structured vocabulary generation.
+
+Gemini is asked for a JSON array of typed entries (constrained by
+VOCAB_SCHEMA through the response MIME type / schema) and the reply is
+checked by a validator compiled once from the same schema. Entries that fail
+validation are dropped individually instead of failing the whole list.
+"""
+import json
+
+
+class SchemaError(ValueError):
+    """Raised when a value does not match a compiled schema"""
+
+
+VOCAB_FIELDS = ("word", "meaning", "part_of_speech", "example", "ipa")
+
+VOCAB_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "word": {"type": "STRING"},
+            "meaning": {"type": "STRING"},
+            "part_of_speech": {"type": "STRING"},
+            "example": {"type": "STRING"},
+            "ipa": {"type": "STRING"},
+        },
+        "required": ["word", "meaning"],
+    },
+}
+
+VOCAB_GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": VOCAB_SCHEMA,
+}
+
+
+def compile_schema(schema):
+    """Turn a (Gemini-style) schema into a validating function.
+
+    The returned function takes a decoded JSON value and returns a cleaned
+    copy of it, or raises SchemaError. Only the subset of the schema language
+    used in this app is supported: ARRAY, OBJECT, STRING and BOOLEAN.
+    """
+    kind = schema["type"]
+
+    if kind == "BOOLEAN":
+        def check_boolean(value):
+            if not isinstance(value, bool):
+                raise SchemaError(f"expected boolean, got {type(value).__name__}")
+            return value
+        return check_boolean
+
+    if kind == "STRING":
+        def check_string(value):
+            if not isinstance(value, str):
+                raise SchemaError(f"expected string, got {type(value).__name__}")
+            return value.strip()
+        return check_string
+
+    if kind == "ARRAY":
+        check_item = compile_schema(schema["items"])
+
+        def check_array(value):
+            if not isinstance(value, list):
+                raise SchemaError(f"expected array, got {type(value).__name__}")
+            return [check_item(item) for item in value]
+        return check_array
+
+    if kind == "OBJECT":
+        properties = tuple((name, compile_schema(sub)) for name, sub in schema["properties"].items())
+        required = tuple(schema.get("required", ()))
+
+        def check_object(value):
+            if not isinstance(value, dict):
+                raise SchemaError(f"expected object, got {type(value).__name__}")
+            cleaned = {}
+            for name, check in properties:
+                if value.get(name) is not None:
+                    cleaned[name] = check(value[name])
+            for name in required:
+                if cleaned.get(name) in (None, "", []):
+                    raise SchemaError(f"missing required field '{name}'")
+            return cleaned
+        return check_object
+
+    raise ValueError(f"Unsupported schema type: {kind}")
+
+
+check_vocab_entry = compile_schema(VOCAB_SCHEMA["items"])
+
+
+def strip_code_fence(raw_text):
+    """Remove a ```json ... ``` fence some replies wrap around the payload"""
+    text = raw_text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        if text.rstrip().endswith("```"):
+            text = text.rstrip()[:-3]
+    return text
+
+
+def parse_vocab_json(raw_text):
+    """Parse a JSON vocabulary reply, keeping every entry that validates"""
+    try:
+        data = json.loads(strip_code_fence(raw_text))
+    except ValueError:
+        return []
+    if isinstance(data, dict):
+        # Tolerate {"vocabulary": [...]} style wrappers
+        data = next((v for v in data.values() if isinstance(v, list)), [])
+    if not isinstance(data, list):
+        return []
+
+    entries = []
+    for item in data:
+        try:
+            entries.append(check_vocab_entry(item))
+        except SchemaError:
+            continue
+    return entries
+
+
+def iter_vocab_json(chunks):
+    """Yield validated entries from a streamed JSON vocabulary reply.
+
+    chunks are pieces of the reply text as they arrive. Each entry is parsed
+    as soon as its closing brace is seen, so the first entry is available
+    long before the array is complete. Objects that don't validate (such as
+    a {"vocabulary": [...]} wrapper) are skipped.
+    """
+    buffer = ""
+    starts = []
+    in_string = False
+    escaped = False
+    for chunk in chunks:
+        offset = len(buffer)
+        buffer += chunk
+        for index in range(offset, len(buffer)):
+            char = buffer[index]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == "\\":
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char == "{":
+                starts.append(index)
+            elif char == "}" and starts:
+                start = starts.pop()
+                try:
+                    yield check_vocab_entry(json.loads(buffer[start:index + 1]))
+                except ValueError:
+                    continue
+        # Only text from the outermost open object onwards can still be needed
+        if not starts:
+            buffer = ""
+        elif starts[0]:
+            shift = starts[0]
+            buffer = buffer[shift:]
+            starts = [start - shift for start in starts]
+
+
+def vocab_prompt(count, language, level, focus, single_words=False, avoid=(), kind=None):
+    """Prompt for count structured vocabulary entries, none of them in avoid.
+
+    kind ("verbs", "nouns", ...) restricts the list to one kind of word.
+    """
+    words = kind or ("single words (no phrases)" if single_words else "words or short phrases")
+    excluded = f"\n    Don't include any of these words the learner already knows: {', '.join(avoid)}." if avoid else ""
+    return f"""Create a {level.lower()} vocabulary list of {count} {words} for someone learning {language} with a focus on {focus.lower()}.{excluded}
+    Return a JSON array. For each entry give the {language} word, its English meaning, the part of speech,
+    a short example sentence in {language} and the IPA pronunciation."""
+
+
+def format_vocab_markdown(entries):
+    """Render vocabulary entries as a markdown list"""
+    lines = []
+    for entry in entries:
+        line = f"- **{entry['word']}**"
+        if entry.get("ipa"):
+            line += f" /{entry['ipa'].strip('/')}/"
+        if entry.get("part_of_speech"):
+            line += f" *({entry['part_of_speech']})*"
+        line += f" – {entry['meaning']}"
+        if entry.get("example"):
+            line += f"  \n  _{entry['example']}_"
+        lines.append(line)
+    return "\n".join(lines)
@@ -0,0 +1,94 @@
+"""Process-wide index of every vocabulary entry the app has served.
+
+Entries are keyed by (language, folded word), where folding strips accents
+and case so "Café", "cafe" and "CAFÉ" are one word. Besides the hash map,
+each language has a trie over folded words for prefix lookups, and each
+(language, level, focus) keeps the order its words were added in so new
+requests can be answered from words a learner hasn't seen yet, leaving the
+model to generate only the rest.
+"""
+import random
+import threading
+import unicodedata
+
+
+def fold(text):
+    """Accent- and case-insensitive form of a word, with whitespace collapsed"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.casefold().split())
+
+
+class VocabIndex:
+    def __init__(self):
+        self._entries = {}
+        self._by_settings = {}
+        self._tries = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, language_word):
+        language, word = language_word
+        return (language, fold(word)) in self._entries
+
+    def add(self, language, level, focus, entries):
+        """Index entries generated for these settings. Returns how many words were new"""
+        added = 0
+        with self._lock:
+            words = self._by_settings.setdefault((language, level, focus), {})
+            for entry in entries:
+                key = fold(entry["word"])
+                if not key:
+                    continue
+                if (language, key) not in self._entries:
+                    self._entries[(language, key)] = dict(entry)
+                    self._insert(language, key)
+                    added += 1
+                # A word can belong to several levels and focuses
+                words.setdefault(key, None)
+        return added
+
+    def sample(self, language, level, focus, count, exclude=(), single_words=False, rng=random):
+        """Up to count random entries for these settings whose folded word is not in exclude"""
+        with self._lock:
+            keys = [key for key in self._by_settings.get((language, level, focus), ())
+                    if key not in exclude and not (single_words and " " in key)]
+            picked = rng.sample(keys, min(count, len(keys)))
+            return [dict(self._entries[(language, key)]) for key in picked]
+
+    def available(self, language, level, focus, exclude=(), single_words=False):
+        """How many entries sample() could return for these settings"""
+        with self._lock:
+            return sum(1 for key in self._by_settings.get((language, level, focus), ())
+                       if key not in exclude and not (single_words and " " in key))
+
+    def prefix(self, language, text, limit=20):
+        """Entries whose folded word starts with the folded text, in alphabetical order"""
+        prefix = fold(text)
+        with self._lock:
+            node = self._tries.get(language)
+            for char in prefix:
+                if node is None:
+                    return []
+                node = node.get(char)
+            if node is None:
+                return []
+            matches = []
+            stack = [(node, prefix)]
+            # Depth-first, visiting children in reverse so words pop out in order
+            while stack and len(matches) < limit:
+                node, word = stack.pop()
+                if None in node:
+                    matches.append(dict(self._entries[(language, word)]))
+                for char in sorted((char for char in node if char is not None), reverse=True):
+                    stack.append((node[char], word + char))
+            return matches
+
+    def _insert(self, language, key):
+        node = self._tries.setdefault(language, {})
+        for char in key:
+            node = node.setdefault(char, {})
+        # None marks the end of a word
+        node[None] = True